@@ -0,0 +1,53 @@
+"""Асинхронные представления для ASGI-режима.
+
+Работа с ORM и сериализация выполняются в пуле потоков через
+sync_to_async(thread_sensitive=False), поэтому медленные клиенты не
+занимают поток воркера, а запросы не выстраиваются в очередь к одному
+общему потоку.
+"""
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from api import short_links, utils
+from api.views import RecipeViewSet
+
+
+def _offload(view):
+    """Оборачивает синхронное представление в асинхронное."""
+
+    def run(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    run_async = sync_to_async(run, thread_sensitive=False)
+
+    async def async_view(request, *args, **kwargs):
+        return await run_async(request, *args, **kwargs)
+
+    async_view.csrf_exempt = getattr(view, 'csrf_exempt', False)
+    return async_view
+
+
+recipe_list = _offload(
+    RecipeViewSet.as_view({'get': 'list', 'post': 'create'}))
+
+download_shopping_cart = _offload(RecipeViewSet.as_view(
+    {'get': 'download_shopping_cart'},
+    **RecipeViewSet.download_shopping_cart.kwargs))
+
+_redirect_to_recipe = _offload(utils.redirect_to_recipe)
+
+
+async def redirect_to_recipe(request, short_id):
+    """Короткая ссылка: при попадании в кеш обходится без пула потоков."""
+    recipe_id = short_links.links.get(short_id)
+    if recipe_id is None:
+        return await _redirect_to_recipe(request, short_id)
+    return utils.recipe_redirect(recipe_id or None)
@@ -0,0 +1,69 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from api.cache import LRUCache
+from foodgram import replica_pin
+from foodgram.caches import is_shared_cache
+
+local_tokens = LRUCache(
+    settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_LOCAL_TTL)
+
+
+def _cache_key(key):
+    return f'auth_token:{key}'
+
+
+def invalidate_tokens(*keys):
+    """Удаляет токены из кеша процесса и общего кеша."""
+    for key in keys:
+        local_tokens.delete(key)
+    cache.delete_many([_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication с кешем токен -> пользователь.
+
+    Токен вместе с пользователем ищется сначала в LRU-кеше процесса,
+    затем в общем кеше и только потом в базе. Кеш сбрасывается при
+    удалении токена (выход) и при сохранении пользователя (смена пароля,
+    деактивация). В других процессах запись живёт в кеше процесса
+    не дольше AUTH_TOKEN_LOCAL_TTL секунд.
+
+    Второй уровень включается, только если CACHE_BACKEND общий для всех
+    процессов: в LocMemCache сброс дошёл бы лишь до текущего воркера, и
+    отозванный токен жил бы в остальных AUTH_TOKEN_SHARED_TTL секунд.
+
+    Найденный пользователь, недавно писавший в базу, читает из основной
+    базы (foodgram.replica_pin).
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            replica_pin.route_user(result[0].pk)
+        return result
+
+    def authenticate_credentials(self, key):
+        token = local_tokens.get(key)
+        if token is None:
+            token = self._load_token(key)
+            local_tokens.set(key, token)
+        # Пользователь из кеша общий для потоков, запросу отдаётся копия.
+        user = copy.copy(token.user)
+        if not user.is_active:
+            invalidate_tokens(key)
+            return super().authenticate_credentials(key)
+        return user, token
+
+    def _load_token(self, key):
+        """Токен из общего кеша или из базы."""
+        if not is_shared_cache():
+            return super().authenticate_credentials(key)[1]
+        token = cache.get(_cache_key(key))
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(_cache_key(key), token, settings.AUTH_TOKEN_SHARED_TTL)
+        return token
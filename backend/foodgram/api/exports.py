@@ -0,0 +1,150 @@
+"""Потоковая выгрузка рецептов.
+
+Архив собирается по частям: zipfile пишет в буфер без поддержки seek,
+после каждой записи накопленные байты отдаются клиенту, поэтому в памяти
+держится не больше одной пачки рецептов и одного блока картинки.
+Каталог для выгрузки в NDJSON читается плоскими строками через
+серверный курсор.
+"""
+
+import io
+import json
+import logging
+import os
+import time
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import prefetch_related_objects
+
+from recipes import constants
+from recipes.tag_mask import get_slugs
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+
+class StreamBuffer(io.RawIOBase):
+    """Приёмник для zipfile, из которого забираются записанные байты."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_chunks(queryset, size):
+    """Перебирает queryset пачками по возрастанию pk.
+
+    В отличие от iterator() в Django 3.2, пачки можно дополнить
+    prefetch_related_objects.
+    """
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def recipe_image_name(recipe):
+    extension = os.path.splitext(recipe.image.name)[1]
+    return f'images/{recipe.pk}{extension}'
+
+
+def recipe_to_dict(recipe):
+    return {
+        'id': recipe.pk,
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'pub_date': recipe.pub_date.isoformat(),
+        'image': recipe_image_name(recipe) if recipe.image else None,
+        'tags': [{'id': tag.pk, 'name': tag.name, 'slug': tag.slug}
+                 for tag in recipe.tags.all()],
+        'ingredients': [
+            {'id': item.ingredient_id,
+             'name': item.ingredient.name,
+             'measurement_unit': item.ingredient.measurement_unit,
+             'amount': item.amount}
+            for item in recipe.recipe_ingredients.all()
+        ],
+    }
+
+
+def iter_recipe_book(user):
+    """Отдаёт ZIP-архив с recipes.ndjson и картинками рецептов автора."""
+    return (part for part in _iter_recipe_book(user) if part)
+
+
+def _iter_recipe_book(user):
+    buffer = StreamBuffer()
+    images = []
+    queryset = Recipe.objects.filter(author=user).only(
+        'name', 'text', 'cooking_time', 'pub_date', 'image')
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('recipes.ndjson', 'w') as ndjson:
+            for chunk in iter_chunks(queryset, constants.EXPORT_CHUNK_SIZE):
+                prefetch_related_objects(
+                    chunk, 'tags', 'recipe_ingredients__ingredient')
+                for recipe in chunk:
+                    ndjson.write(json.dumps(
+                        recipe_to_dict(recipe), ensure_ascii=False
+                    ).encode() + b'\n')
+                    if recipe.image:
+                        images.append(
+                            (recipe.image.name, recipe_image_name(recipe)))
+                yield buffer.pop()
+        storage = Recipe._meta.get_field('image').storage
+        for name, archive_name in images:
+            # Картинки уже сжаты, поэтому кладутся в архив без сжатия.
+            info = zipfile.ZipInfo(archive_name, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            try:
+                source = storage.open(name, 'rb')
+            except OSError:
+                logger.warning('Картинка %s не найдена', name)
+                continue
+            with source, archive.open(info, 'w') as target:
+                for block in source.chunks():
+                    target.write(block)
+                    yield buffer.pop()
+    yield buffer.pop()
+
+
+CATALOG_FIELDS = ('id', 'name', 'text', 'cooking_time', 'pub_date',
+                  'updated', 'author_id', 'author__username', 'image',
+                  'tags_mask')
+
+
+def iter_catalog(since=None):
+    """Отдаёт рецепты каталога строками NDJSON.
+
+    Если передан since, выгружаются только рецепты, изменённые позже.
+    """
+    queryset = Recipe.objects.order_by('pk')
+    if since is not None:
+        queryset = queryset.filter(updated__gt=since)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    lines = []
+    for row in queryset.values(*CATALOG_FIELDS).iterator(
+            chunk_size=constants.CATALOG_CHUNK_SIZE):
+        row['author_username'] = row.pop('author__username')
+        row['tags'] = get_slugs(row.pop('tags_mask'))
+        lines.append(encoder.encode(row))
+        if len(lines) >= constants.CATALOG_CHUNK_SIZE:
+            yield '\n'.join(lines).encode() + b'\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines).encode() + b'\n'
@@ -1,7 +1,9 @@
+from django.db.models import Exists, F, OuterRef
 from django_filters import rest_framework as rest_filter
 from rest_framework import filters
 
-from recipes.models import Recipe
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.tag_mask import get_mask, get_tag_choices
 
 
 class IngredientFilter(filters.SearchFilter):
@@ -19,33 +21,59 @@ class RecipeFilter(rest_filter.FilterSet):
     Фильтрует рецепты по тегам, автору, избранному и корзине.
 
     Поля:
-        tags - фильтрует по тегам
+        tags - фильтрует по тегам (любой из переданных)
+        tags_all - фильтрует по тегам (все переданные)
         author - фильтрует по автору
         is_favorited - фильтрует по избранному
         is_in_shopping_cart - фильтрует по корзине
     """
 
-    tags = rest_filter.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = rest_filter.MultipleChoiceFilter(
+        choices=get_tag_choices, method='filter_tags')
+    tags_all = rest_filter.MultipleChoiceFilter(
+        choices=get_tag_choices, method='filter_tags_all')
     author = rest_filter.NumberFilter(field_name='author__id')
     is_favorited = rest_filter.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = rest_filter.BooleanFilter(method='filter_is_in_cart')
 
+    def filter_tags(self, qs, name, value):
+        """Фильтрует по маске тегов: хотя бы один из тегов."""
+        return qs.alias(
+            tags_any=F('tags_mask').bitand(get_mask(value))
+        ).exclude(tags_any=0)
+
+    def filter_tags_all(self, qs, name, value):
+        """Фильтрует по маске тегов: все теги сразу."""
+        mask = get_mask(value)
+        return qs.alias(
+            tags_all_match=F('tags_mask').bitand(mask)
+        ).filter(tags_all_match=mask)
+
+    def _filter_user_recipes(self, qs, model, value):
+        if not value:
+            return qs
+        user = self.request.user
+        if not user.is_authenticated:
+            return qs.none()
+        return qs.filter(Exists(model.objects.filter(
+            user=user, recipe=OuterRef('pk'))))
+
     def filter_is_favorited(self, qs, name, value):
-        """Фильтрует по избранному."""
-        if not self.request.user.is_authenticated:
-            return qs.none() if value else qs
-        return qs.filter(
-            favorites__user=self.request.user) if value else qs
+        """Фильтрует по избранному.
+
+        Условие EXISTS не зависит от аннотаций RecipeViewSet.get_queryset,
+        поэтому тот же фильтр работает и для счётчиков (recipes.facets),
+        где аннотации убраны, и остаётся полусоединением, а не JOIN.
+        """
+        return self._filter_user_recipes(qs, Favorite, value)
 
     def filter_is_in_cart(self, qs, name, value):
-        """Фильтрует по корзине."""
-        if not self.request.user.is_authenticated:
-            return qs.none() if value else qs
-        return qs.filter(
-            shoppingcarts__user=self.request.user) if value else qs
+        """Фильтрует по корзине тем же условием EXISTS."""
+        return self._filter_user_recipes(qs, ShoppingCart, value)
 
     class Meta:
         """Метаданные фильтра."""
 
         model = Recipe
-        fields = ['tags', 'author', 'is_favorited', 'is_in_shopping_cart']
+        fields = ['tags', 'tags_all', 'author', 'is_favorited',
+                  'is_in_shopping_cart']
@@ -0,0 +1,181 @@
+"""Массовый импорт рецептов из NDJSON.
+
+Строки читаются потоком и обрабатываются пачками по IMPORT_CHUNK_SIZE:
+ингредиенты и теги пачки загружаются двумя запросами, рецепты, связи
+с тегами, ингредиенты и короткие ссылки вставляются bulk_create в одной
+транзакции. Ошибочные записи попадают в отчёт и не прерывают импорт.
+Сигналы post_save при bulk_create не отправляются, поэтому ленты,
+похожие рецепты и индекс ингредиентов обновляются здесь же. Картинки
+сохраняются в хранилище один раз до вставки, а файлы записей, которые
+так и не попали в базу, удаляются.
+"""
+
+import json
+from itertools import islice
+
+from django.db import DatabaseError, connection, transaction
+
+from api.serializers import RecipeImportSerializer
+from jobs.queue import enqueue
+from recipes import constants, feed, similarity
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, ShortLink,
+                            Tag)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _collect_ids(records):
+    """Собирает id ингредиентов и тегов всех записей пачки."""
+    ingredient_ids, tag_ids = set(), set()
+    for _, data in records:
+        ingredients, tags = data.get('ingredients'), data.get('tags')
+        if isinstance(ingredients, list):
+            ingredient_ids.update(
+                _as_int(item.get('id')) for item in ingredients
+                if isinstance(item, dict))
+        if isinstance(tags, list):
+            tag_ids.update(_as_int(tag) for tag in tags)
+    ingredient_ids.discard(None)
+    tag_ids.discard(None)
+    return ingredient_ids, tag_ids
+
+
+def _save_image(image):
+    """Сохраняет картинку рецепта в хранилище и возвращает её имя."""
+    field = Recipe._meta.get_field('image')
+    return field.storage.save(
+        field.generate_filename(None, image.name), image)
+
+
+def _delete_image(name):
+    Recipe._meta.get_field('image').storage.delete(name)
+
+
+def _insert(author, rows):
+    """Вставляет проверенные рецепты; возвращает их с проставленными pk."""
+    recipes = []
+    for data in rows:
+        recipes.append(Recipe(
+            author=author,
+            name=data['name'],
+            text=data['text'],
+            cooking_time=data['cooking_time'],
+            image=data['image'],
+            tags_mask=sum(1 << tag.bit for tag in data['tags']),
+        ))
+    Recipe.objects.bulk_create(recipes)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        # SQLite не возвращает pk из bulk_create. Запись в базу заблокирована
+        # до конца транзакции, поэтому последние строки автора ― наши.
+        pks = (Recipe.objects.filter(author=author)
+               .order_by('-pk').values_list('pk', flat=True)[:len(recipes)])
+        for recipe, pk in zip(recipes, reversed(pks)):
+            recipe.pk = pk
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag.pk)
+        for recipe, data in zip(recipes, rows) for tag in data['tags']
+    ])
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe_id=recipe.pk,
+                         ingredient=item['ingredient'],
+                         amount=item['amount'])
+        for recipe, data in zip(recipes, rows)
+        for item in data['ingredients']
+    ])
+    ShortLink.objects.bulk_create([
+        ShortLink(recipe_id=recipe.pk, slug=ShortLink.make_slug(recipe.pk))
+        for recipe in recipes
+    ])
+    return recipes
+
+
+def process_imported_recipes(recipe_ids):
+    """Раскладывает рецепты по лентам и пересчитывает похожие рецепты."""
+    for recipe_id in recipe_ids:
+        feed.fan_out_recipe(recipe_id)
+        similarity.refresh_recipe(recipe_id)
+
+
+def _import_chunk(author, records, report):
+    ingredient_ids, tag_ids = _collect_ids(records)
+    objects = {Ingredient: Ingredient.objects.in_bulk(ingredient_ids),
+               Tag: Tag.objects.in_bulk(tag_ids)}
+    valid = []
+    for line, data in records:
+        serializer = RecipeImportSerializer(
+            data=data, context={'objects': objects})
+        if serializer.is_valid():
+            valid.append((line, serializer.validated_data))
+        else:
+            report['errors'].append(
+                {'line': line, 'errors': serializer.errors})
+    if not valid:
+        return
+    for _, data in valid:
+        data['image'] = _save_image(data['image'])
+    try:
+        with transaction.atomic():
+            recipes = _insert(author, [data for _, data in valid])
+        created = list(zip((line for line, _ in valid), recipes))
+    except DatabaseError:
+        # Пачка не прошла целиком: вставляем записи по одной, чтобы
+        # найти ошибочные и сохранить остальные.
+        created = []
+        for line, data in valid:
+            try:
+                with transaction.atomic():
+                    created.append((line, _insert(author, [data])[0]))
+            except DatabaseError as error:
+                _delete_image(data['image'])
+                report['errors'].append(
+                    {'line': line, 'errors': {'non_field_errors': [
+                        str(error)]}})
+    if not created:
+        return
+    recipe_ids = [recipe.pk for _, recipe in created]
+    report['recipes'].extend(
+        {'line': line, 'id': recipe.pk} for line, recipe in created)
+    transaction.on_commit(lambda: ingredient_index.update_recipes(recipe_ids))
+    enqueue(process_imported_recipes, recipe_ids)
+
+
+def import_recipes(author, lines):
+    """Импортирует рецепты автора из строк NDJSON (bytes или str).
+
+    Возвращает отчёт: созданные рецепты с номерами строк и ошибки.
+    """
+    report = {'recipes': [], 'errors': []}
+    numbered = enumerate(lines, 1)
+    while True:
+        chunk = list(islice(numbered, constants.IMPORT_CHUNK_SIZE))
+        if not chunk:
+            break
+        records = []
+        for line, raw in chunk:
+            if not raw.strip():
+                continue
+            try:
+                data = json.loads(raw)
+            except ValueError as error:
+                report['errors'].append(
+                    {'line': line,
+                     'errors': {'non_field_errors': [
+                         f'Некорректный JSON: {error}']}})
+                continue
+            if not isinstance(data, dict):
+                report['errors'].append(
+                    {'line': line,
+                     'errors': {'non_field_errors': [
+                         'Ожидается JSON-объект.']}})
+                continue
+            records.append((line, data))
+        if records:
+            _import_chunk(author, records, report)
+    report['created'] = len(report['recipes'])
+    return report
@@ -0,0 +1,156 @@
+"""Stateless-аутентификация по подписанным JWT.
+
+Access-токен несёт в себе данные пользователя, поэтому безопасные запросы
+проверяются без обращения к базе: подпись, срок жизни и список отзыва,
+который хранится в памяти процесса и подгружается из RevokedToken раз
+в JWT_REVOCATION_REFRESH секунд. Запросы на запись загружают пользователя
+из базы, чтобы изменения не делались от имени устаревших данных токена.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from foodgram import replica_pin
+from users.models import RevokedToken
+
+User = get_user_model()
+
+USER_CLAIMS = ('username', 'email', 'first_name', 'last_name', 'role',
+               'is_staff', 'is_superuser')
+# Запас на записи, закоммиченные позже, чем была проставлена revoked_at.
+REVOCATION_OVERLAP = timedelta(seconds=60)
+
+
+class RefreshToken(tokens.RefreshToken):
+    """Refresh-токен с данными пользователя и временем выпуска.
+
+    Полученный из него access-токен копирует эти claims.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['iat'] = token.current_time.timestamp()
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token['avatar'] = user.avatar.name
+        return token
+
+
+class RevocationList:
+    """Список отозванных токенов в памяти процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jtis = {}
+        self._users = {}
+        self._since = None
+        self._checked = None
+
+    def _add(self, jti, user_id, revoked_at, expires_at):
+        if jti:
+            self._jtis[jti] = expires_at
+        else:
+            self._users[user_id] = max(
+                self._users.get(user_id, (0, 0)),
+                (revoked_at.timestamp(), expires_at))
+
+    def refresh(self, force=False):
+        """Догружает новые записи и забывает истёкшие."""
+        now = time.monotonic()
+        if (not force and self._checked is not None
+                and now - self._checked < settings.JWT_REVOCATION_REFRESH):
+            return
+        with self._lock:
+            current = timezone.now()
+            revoked = RevokedToken.objects.filter(expires_at__gt=current)
+            if self._since is not None:
+                revoked = revoked.filter(
+                    revoked_at__gte=self._since - REVOCATION_OVERLAP)
+            for row in revoked.values_list(
+                    'jti', 'user_id', 'revoked_at', 'expires_at'):
+                self._add(*row)
+            self._jtis = {jti: expires_at
+                          for jti, expires_at in self._jtis.items()
+                          if expires_at > current}
+            self._users = {user_id: value
+                           for user_id, value in self._users.items()
+                           if value[1] > current}
+            self._since = current
+            self._checked = now
+
+    def is_revoked(self, token):
+        self.refresh()
+        if token.get(api_settings.JTI_CLAIM) in self._jtis:
+            return True
+        revoked = self._users.get(token.get(api_settings.USER_ID_CLAIM))
+        return revoked is not None and token.get('iat', 0) <= revoked[0]
+
+    def revoke_token(self, token):
+        """Отзывает один токен до истечения его срока."""
+        expires_at = datetime.fromtimestamp(token['exp'], dt_timezone.utc)
+        revoked = RevokedToken.objects.create(
+            jti=token[api_settings.JTI_CLAIM], expires_at=expires_at)
+        self._add(revoked.jti, None, revoked.revoked_at, expires_at)
+
+    def revoke_user(self, user):
+        """Отзывает все выпущенные пользователю токены."""
+        revoked = RevokedToken.objects.create(
+            user=user,
+            expires_at=(timezone.now()
+                        + api_settings.REFRESH_TOKEN_LIFETIME))
+        self._add('', user.pk, revoked.revoked_at, revoked.expires_at)
+
+
+revocation_list = RevocationList()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без обращения к базе на чтение.
+
+    Заголовок ``Authorization: Bearer <access>``; запросы с заголовком
+    ``Token`` пропускаются и обрабатываются CachedTokenAuthentication.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS:
+            user = self.get_stateless_user(token)
+            replica_pin.route_user(user.pk)
+            return user, token
+        return self.get_user(token), token
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocation_list.is_revoked(token):
+            raise InvalidToken('Токен отозван.')
+        return token
+
+    def get_stateless_user(self, token):
+        """Собирает пользователя из claims токена."""
+        if api_settings.USER_ID_CLAIM not in token:
+            raise InvalidToken(
+                'Токен не содержит идентификатора пользователя.')
+        user = User(
+            pk=token[api_settings.USER_ID_CLAIM],
+            avatar=token.get('avatar', ''),
+            **{claim: token[claim] for claim in USER_CLAIMS
+               if claim in token})
+        user._state.adding = False
+        return user
@@ -0,0 +1,67 @@
+import io
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from api.views import IngredientViewSet, RecipeViewSet
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость JSONRenderer/JSONParser и '
+            'ORJSONRenderer/ORJSONParser на ответах API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=100,
+                            help='Размер страницы списка рецептов.')
+
+    def _payloads(self, options):
+        factory = APIRequestFactory()
+        views = (
+            (f'recipes?limit={options["limit"]}',
+             RecipeViewSet.as_view({'get': 'list'}),
+             factory.get('/api/recipes/', {'limit': options['limit']})),
+            ('ingredients',
+             IngredientViewSet.as_view({'get': 'list'}),
+             factory.get('/api/ingredients/')),
+        )
+        for name, view, request in views:
+            request.user = AnonymousUser()
+            yield name, view(request).data
+
+    def _time(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        for name, data in self._payloads(options):
+            expected = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != expected:
+                self.stderr.write(self.style.ERROR(
+                    f'{name}: вывод ORJSONRenderer отличается.'))
+            self.stdout.write(f'{name}: {len(expected) / 1024:.1f} КБ')
+            results = (
+                ('render', JSONRenderer().render, ORJSONRenderer().render,
+                 data),
+                ('parse',
+                 lambda body: JSONParser().parse(io.BytesIO(body)),
+                 lambda body: ORJSONParser().parse(io.BytesIO(body)),
+                 expected),
+            )
+            for operation, default, fast, argument in results:
+                slow_time = self._time(lambda: default(argument), repeat)
+                fast_time = self._time(lambda: fast(argument), repeat)
+                self.stdout.write(
+                    f'  {operation:<6} json {slow_time * 1e3:8.3f} мс, '
+                    f'orjson {fast_time * 1e3:8.3f} мс '
+                    f'(x{slow_time / fast_time:.1f}, '
+                    f'{len(expected) / fast_time / 2 ** 20:.0f} МБ/с)')
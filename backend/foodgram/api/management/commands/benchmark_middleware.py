@@ -0,0 +1,70 @@
+import statistics
+import time
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIHandler as DefaultWSGIHandler
+from django.core.management.base import BaseCommand
+
+from foodgram.handlers import WSGIHandler
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время обработки запроса к API полным и '
+            'облегчённым набором middleware.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/tags/')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--rounds', type=int, default=9)
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--token', default='',
+                            help='Значение заголовка Authorization.')
+
+    def _environ(self, options):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': options['path'],
+            'QUERY_STRING': '',
+            'SERVER_NAME': options['host'],
+            'SERVER_PORT': '80',
+            'HTTP_HOST': options['host'],
+            'REMOTE_ADDR': '127.0.0.1',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': BytesIO(),
+        }
+        if options['token']:
+            environ['HTTP_AUTHORIZATION'] = options['token']
+        return environ
+
+    def _run(self, handler, options):
+        def start_response(status, headers):
+            self.status = status
+
+        started = time.perf_counter()
+        for _ in range(options['requests']):
+            b''.join(handler(self._environ(options), start_response))
+        return (time.perf_counter() - started) / options['requests']
+
+    def handle(self, *args, **options):
+        handlers = {'MIDDLEWARE': DefaultWSGIHandler(),
+                    'API_MIDDLEWARE': WSGIHandler()}
+        timings = {name: [] for name in handlers}
+        # Прогрев, затем чередование раундов, чтобы фоновые колебания
+        # одинаково влияли на оба варианта.
+        for handler in handlers.values():
+            self._run(handler, options)
+        for _ in range(options['rounds']):
+            for name, handler in handlers.items():
+                timings[name].append(self._run(handler, options))
+        results = {}
+        for name, values in timings.items():
+            results[name] = statistics.median(values)
+            self.stdout.write(
+                f'{name:<15} {results[name] * 1e6:9.1f} мкс/запрос '
+                f'({self.status})')
+        saved = results['MIDDLEWARE'] - results['API_MIDDLEWARE']
+        self.stdout.write(self.style.SUCCESS(
+            f'Экономия: {saved * 1e6:.1f} мкс/запрос '
+            f'({saved / results["MIDDLEWARE"]:.1%}).'))
@@ -0,0 +1,62 @@
+import pickle
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.throttling import TokenBucketThrottle
+
+
+class Command(BaseCommand):
+    help = ('Измеряет накладные расходы TokenBucketThrottle на запрос '
+            'и размер записи в кеше в сравнении с SimpleRateThrottle.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rate', default='1000/min')
+        parser.add_argument('--clients', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=20000)
+
+    def _throttle(self, base, rate):
+        return type(base.__name__, (base,), {
+            'scope': 'benchmark', 'rate': rate,
+            'cache_format': f'benchmark:{base.__name__}:%(ident)s'})
+
+    def _requests(self, clients):
+        factory = APIRequestFactory()
+        requests = []
+        for client in range(clients):
+            request = Request(factory.get(
+                '/api/recipes/', REMOTE_ADDR=f'10.0.{client // 256}.'
+                                             f'{client % 256}'))
+            request.user = AnonymousUser()
+            requests.append(request)
+        return requests
+
+    def handle(self, *args, **options):
+        requests = self._requests(options['clients'])
+        for base in (SimpleRateThrottle, TokenBucketThrottle):
+            throttle_class = self._throttle(base, options['rate'])
+            if base is SimpleRateThrottle:
+                throttle_class.get_cache_key = (
+                    lambda self, request, view: self.cache_format % {
+                        'ident': self.get_ident(request)})
+            allowed = 0
+            started = time.perf_counter()
+            for number in range(options['requests']):
+                allowed += throttle_class().allow_request(
+                    requests[number % len(requests)], None)
+            elapsed = time.perf_counter() - started
+            throttle = throttle_class()
+            key = throttle.get_cache_key(requests[0], None)
+            size = len(pickle.dumps(cache.get(key)))
+            cache.delete_many([throttle.get_cache_key(request, None)
+                               for request in requests])
+            self.stdout.write(
+                f'{base.__name__:<20} '
+                f'{elapsed / options["requests"] * 1e6:7.1f} мкс/запрос, '
+                f'пропущено {allowed}/{options["requests"]}, '
+                f'запись в кеше {size} Б')
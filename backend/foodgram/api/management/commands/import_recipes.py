@@ -0,0 +1,32 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.imports import import_recipes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Импортирует рецепты из NDJSON-файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON.')
+        parser.add_argument('--author', required=True,
+                            help='Email автора рецептов.')
+
+    def handle(self, *args, **options):
+        author = User.objects.filter(email=options['author']).first()
+        if author is None:
+            raise CommandError(
+                f'Пользователь {options["author"]} не найден.')
+        with open(options['path'], 'rb') as lines:
+            report = import_recipes(author, lines)
+        for error in report['errors']:
+            self.stderr.write(
+                f'Строка {error["line"]}: '
+                f'{json.dumps(error["errors"], ensure_ascii=False)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано рецептов: {report["created"]}, '
+            f'ошибок: {len(report["errors"])}.'))
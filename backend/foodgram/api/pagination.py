@@ -1,6 +1,110 @@
-from rest_framework.pagination import PageNumberPagination
+"""Пагинация с кешируемым и приблизительным числом объектов.
+
+Для больших выборок вместо COUNT(*) берётся оценка планировщика; в этом
+случае в ответе count_approximate = true. Оценка кешируется на
+PAGINATION_COUNT_CACHE_TTL секунд по SQL-запросу подсчёта, то есть по
+нормализованному набору фильтров, поэтому переход между страницами не
+повторяет EXPLAIN. Точное число не кешируется: после записи оно должно
+сразу совпадать со списком. Страница всегда режется по per_page, а не
+по числу объектов, поэтому устаревшая оценка не теряет строки.
+"""
+
+import hashlib
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import QuerySet
+from rest_framework.pagination import (LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+
+from foodgram.db.counts import estimate_count
+
+
+def get_count(queryset):
+    """Возвращает (число объектов, признак приблизительного значения).
+
+    Списки (например, результат поиска по индексу ингредиентов)
+    считаются через len().
+    """
+    if not isinstance(queryset, QuerySet):
+        return len(queryset), False
+    queryset = queryset.order_by()
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha1(
+        f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+    key = f'page_count:{digest}'
+    estimate = cache.get(key)
+    if estimate is None:
+        # 0 ― оценки нет или выборка мала: тоже кешируем, чтобы не
+        # повторять EXPLAIN.
+        estimate = estimate_count(queryset) or 0
+        cache.set(key, estimate, settings.PAGINATION_COUNT_CACHE_TTL)
+    if estimate >= settings.ESTIMATED_COUNT_THRESHOLD:
+        return estimate, True
+    return queryset.count(), False
+
+
+class CountedPaginator(Paginator):
+    """Paginator с заранее посчитанным числом объектов."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+    def page(self, number):
+        """Страница из per_page объектов без обрезки по count."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     max_page_size = 100
+    count_approximate = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        count, self.count_approximate = get_count(queryset)
+        self.django_paginator_class = partial(CountedPaginator, count=count)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_approximate', self.count_approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_approximate'] = {'type': 'boolean'}
+        return schema
+
+
+class CountCachedLimitOffsetPagination(LimitOffsetPagination):
+    count_approximate = False
+
+    def get_count(self, queryset):
+        count, self.count_approximate = get_count(queryset)
+        return count
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('count_approximate', self.count_approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_approximate'] = {'type': 'boolean'}
+        return schema
@@ -0,0 +1,87 @@
+"""Кеш публичного представления рецепта.
+
+Рецепт на странице рецепта одинаков для всех, кроме флагов
+is_favorited, is_in_shopping_cart и author.is_subscribed. Представление
+с этими флагами, равными False, хранится в общем кеше, а флаги текущего
+пользователя считаются одним запросом и подставляются в копию.
+
+Запись проверяется по двум меткам версии: метке рецепта (меняется при
+изменении рецепта и его автора) и метке справочников (ингредиенты и
+теги). Все три ключа читаются одним get_many до обращения к базе,
+поэтому запись, собранная во время изменения рецепта, не совпадёт с
+новой меткой и не будет отдана. Ссылки на картинки абсолютные, поэтому
+в ключ входит адрес сайта из запроса.
+
+Кеш работает только с общим для воркеров CACHE_BACKEND: с кешем
+процесса сброс метки в одном воркере не виден остальным.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+CATALOG_STAMP_KEY = 'recipe_cache:catalog'
+PERSONAL_FIELDS = ('is_favorited', 'is_in_shopping_cart')
+
+
+def _stamp_key(recipe_id):
+    return f'recipe_cache:stamp:{recipe_id}'
+
+
+def _data_key(recipe_id, base_url):
+    return f'recipe_cache:data:{recipe_id}:{base_url}'
+
+
+def _new_stamp():
+    return uuid.uuid4().hex
+
+
+def lookup(recipe_id, base_url):
+    """Возвращает (представление или None, метки для store)."""
+    keys = (_data_key(recipe_id, base_url), _stamp_key(recipe_id),
+            CATALOG_STAMP_KEY)
+    found = cache.get_many(keys)
+    stamps = []
+    for key in keys[1:]:
+        stamp = found.get(key)
+        if stamp is None:
+            # Метки нет или её вытеснили: заводим новую, но не затираем
+            # метку, которую успел записать другой процесс.
+            cache.add(key, _new_stamp(), None)
+            stamp = cache.get(key)
+        stamps.append(stamp)
+    stamps = tuple(stamps)
+    entry = found.get(keys[0])
+    if entry is not None and entry[0] == stamps:
+        return entry[1], stamps
+    return None, stamps
+
+
+def store(recipe_id, base_url, stamps, data):
+    """Сохраняет публичную копию представления рецепта."""
+    public = dict(data, **{field: False for field in PERSONAL_FIELDS})
+    public['author'] = dict(data['author'], is_subscribed=False)
+    cache.set(_data_key(recipe_id, base_url), (stamps, public),
+              settings.RECIPE_CACHE_TTL)
+
+
+def personalize(data, is_favorited, is_in_shopping_cart, is_subscribed):
+    """Подставляет флаги пользователя в публичное представление."""
+    return dict(
+        data,
+        author=dict(data['author'], is_subscribed=is_subscribed),
+        is_favorited=is_favorited,
+        is_in_shopping_cart=is_in_shopping_cart,
+    )
+
+
+def invalidate_recipes(*recipe_ids):
+    """Сбрасывает кеш рецептов."""
+    cache.set_many({_stamp_key(recipe_id): _new_stamp()
+                    for recipe_id in recipe_ids}, None)
+
+
+def invalidate_catalog():
+    """Сбрасывает кеш всех рецептов после изменения справочников."""
+    cache.set(CATALOG_STAMP_KEY, _new_stamp(), None)
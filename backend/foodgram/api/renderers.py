@@ -0,0 +1,37 @@
+"""Рендерер JSON на orjson.
+
+Выдаёт те же байты, что и rest_framework.renderers.JSONRenderer с
+настройками по умолчанию (UNICODE_JSON, COMPACT_JSON): типы, которые
+orjson не сериализует так же, как DRF (datetime, Decimal, ленивые
+строки, QuerySet), передаются в rest_framework.utils.encoders.JSONEncoder.
+Отступы, ensure_ascii и значения, которые orjson не принимает
+(например, целые больше 64 бит), обрабатываются исходным JSONRenderer.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self._default,
+                               option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем U+2028 и U+2029, чтобы ответ
+        # оставался подмножеством JavaScript.
+        if b'\xe2\x80' in ret:
+            ret = (ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+                   .replace(b'\xe2\x80\xa9', b'\\u2029'))
+        return ret
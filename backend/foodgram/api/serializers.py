@@ -4,8 +4,13 @@ import base64
 
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.exceptions import TokenError
+
+from api.jwt_auth import RefreshToken, revocation_list
 
 from recipes.models import (
     Ingredient, Recipe, RecipeIngredient, Tag,
@@ -25,6 +30,24 @@ class TokenCreateSerializer(serializers.Serializer):
         return {'auth_token': token.key}
 
 
+class JWTRefreshSerializer(serializers.Serializer):
+    """Проверка refresh-токена."""
+
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(str(error))
+        # Refresh выполняется редко, поэтому список отзыва сверяется
+        # с базой, а не с копией в памяти процесса.
+        revocation_list.refresh(force=True)
+        if revocation_list.is_revoked(token):
+            raise serializers.ValidationError('Токен отозван.')
+        return token
+
+
 class UserCreateSerializer(serializers.ModelSerializer):
     """Регистрация нового пользователя."""
 
@@ -74,7 +97,10 @@ class UserSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         if not user.is_authenticated:
             return False
-        return user.subscriptions.filter(author=obj).exists()
+        subscribed = getattr(obj, 'is_subscribed', None)
+        if subscribed is None:
+            subscribed = user.subscriptions.filter(author=obj).exists()
+        return subscribed
 
     class Meta:
         model = User
@@ -149,17 +175,30 @@ class RecipeSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         if not user.is_authenticated:
             return False
-        return getattr(obj, 'is_favorited',
-                       Favorite.objects.filter(user=user, recipe=obj).exists())
+        favorited = getattr(obj, 'is_favorited', None)
+        if favorited is None:
+            favorited = Favorite.objects.filter(
+                user=user, recipe=obj).exists()
+        return favorited
 
     def get_is_in_shopping_cart(self, obj):
         """Возвращает True, если рецепт в корзине, иначе False."""
         user = self.context['request'].user
         if not user.is_authenticated:
             return False
-        return getattr(obj, 'is_in_shopping_cart',
-                       ShoppingCart.objects.filter(user=user,
-                                                   recipe=obj).exists())
+        in_cart = getattr(obj, 'is_in_shopping_cart', None)
+        if in_cart is None:
+            in_cart = ShoppingCart.objects.filter(
+                user=user, recipe=obj).exists()
+        return in_cart
+
+    def to_representation(self, instance):
+        # Подписка на автора приходит аннотацией author_is_subscribed
+        # из RecipeViewSet.get_queryset, а не запросом на каждый рецепт.
+        subscribed = getattr(instance, 'author_is_subscribed', None)
+        if subscribed is not None:
+            instance.author.is_subscribed = subscribed
+        return super().to_representation(instance)
 
     class Meta:
         model = Recipe
@@ -170,8 +209,13 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 
 class IngredientAmountSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(), source='ingredient')
+    """Ингредиент и его количество при записи рецепта.
+
+    Существование ингредиента проверяется в RecipeCreateUpdateSerializer
+    одним запросом на весь список.
+    """
+
+    id = serializers.IntegerField(source='ingredient')
     amount = serializers.IntegerField(min_value=1)
 
     class Meta:
@@ -181,8 +225,7 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
 
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
     author = serializers.HiddenField(default=serializers.CurrentUserDefault())
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True)
+    tags = serializers.ListField(child=serializers.IntegerField())
     ingredients = IngredientAmountSerializer(many=True)
     image = Base64ImageField()
 
@@ -205,14 +248,30 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                 'Время приготовления должно быть положительным числом.')
         return value
 
+    def _load_objects(self, model, ids):
+        return model.objects.in_bulk(ids)
+
+    def _get_objects(self, model, ids):
+        """Получает объекты по списку id одним запросом."""
+        objects = self._load_objects(model, ids)
+        missing = [pk for pk in ids if pk not in objects]
+        if missing:
+            raise serializers.ValidationError(
+                f'Недопустимый первичный ключ "{missing[0]}" - '
+                'объект не существует.')
+        return objects
+
     def validate_ingredients(self, data):
         if not data:
             raise serializers.ValidationError(
                 'Необходимо добавить хотя бы один ингредиент.')
-        ids = [item['ingredient'].id for item in data]
+        ids = [item['ingredient'] for item in data]
         if len(ids) != len(set(ids)):
             raise serializers.ValidationError(
                 'Ингредиенты не должны повторяться.')
+        ingredients = self._get_objects(Ingredient, ids)
+        for item in data:
+            item['ingredient'] = ingredients[item['ingredient']]
         return data
 
     def validate_tags(self, tags):
@@ -221,37 +280,78 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                 'Необходимо добавить хотя бы один тег.')
         if len(tags) != len(set(tags)):
             raise serializers.ValidationError('Теги не должны повторяться.')
-        return tags
+        objects = self._get_objects(Tag, tags)
+        return [objects[pk] for pk in tags]
 
     @staticmethod
-    def _set_tags_and_ingredients(recipe, tags, ingredients):
-        recipe.tags.set(tags)
-        RecipeIngredient.objects.bulk_create([
-            RecipeIngredient(recipe=recipe,
-                             ingredient=item['ingredient'],
-                             amount=item['amount'])
-            for item in ingredients
-        ])
-
+    def _set_ingredients(recipe, ingredients, existing=()):
+        """Приводит ингредиенты рецепта к переданному списку.
+
+        Вставляет новые строки, обновляет количество у изменившихся и
+        удаляет лишние, не трогая совпадающие.
+        """
+        existing = {item.ingredient_id: item for item in existing}
+        to_create, to_update = [], []
+        for item in ingredients:
+            current = existing.pop(item['ingredient'].id, None)
+            if current is None:
+                to_create.append(RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=item['ingredient'],
+                    amount=item['amount']))
+            elif current.amount != item['amount']:
+                current.amount = item['amount']
+                to_update.append(current)
+        if existing:
+            RecipeIngredient.objects.filter(
+                pk__in=[item.pk for item in existing.values()]).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ['amount'])
+        if to_create:
+            RecipeIngredient.objects.bulk_create(to_create)
+
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(**validated_data)
-        self._set_tags_and_ingredients(recipe, tags, ingredients)
+        recipe.tags.set(tags)
+        self._set_ingredients(recipe, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         instance = super().update(instance, validated_data)
-        instance.recipe_ingredients.all().delete()
-        self._set_tags_and_ingredients(instance, tags, ingredients)
+        instance.tags.set(tags)
+        self._set_ingredients(
+            instance, ingredients, instance.recipe_ingredients.all())
         return instance
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance], 'tags', 'recipe_ingredients__ingredient')
         return RecipeSerializer(instance, context=self.context).data
 
 
+class RecipeImportSerializer(RecipeCreateUpdateSerializer):
+    """Проверка рецепта при массовом импорте.
+
+    Ингредиенты и теги берутся из context['objects'], загруженного
+    одним запросом на всю пачку записей.
+    """
+
+    author = None
+
+    class Meta(RecipeCreateUpdateSerializer.Meta):
+        fields = ('name', 'image', 'text',
+                  'ingredients', 'tags', 'cooking_time')
+
+    def _load_objects(self, model, ids):
+        return self.context['objects'][model]
+
+
 class ShortRecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
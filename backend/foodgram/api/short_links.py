@@ -0,0 +1,100 @@
+"""Переходы по коротким ссылкам.
+
+Слаг разрешается в id рецепта через LRU-кеш процесса, в том числе
+кешируется и отсутствие ссылки. Переходы копятся в памяти и
+записываются в базу пачками фоновым потоком раз в
+SHORT_LINK_FLUSH_INTERVAL секунд или после SHORT_LINK_FLUSH_SIZE
+переходов; при аварийной остановке процесса несохранённые переходы
+теряются.
+"""
+
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+
+from api.cache import LRUCache
+from recipes.models import ShortLink
+
+logger = logging.getLogger(__name__)
+
+# Значение в кеше для несуществующей ссылки: id рецепта не бывает нулевым.
+NOT_FOUND = 0
+
+links = LRUCache(settings.SHORT_LINK_CACHE_SIZE, settings.SHORT_LINK_CACHE_TTL)
+
+
+def resolve(slug):
+    """Возвращает id рецепта по слагу или None."""
+    recipe_id = links.get(slug)
+    if recipe_id is None:
+        recipe_id = (ShortLink.objects
+                     .filter(slug=slug)
+                     .values_list('recipe_id', flat=True)
+                     .first()) or NOT_FOUND
+        links.set(slug, recipe_id)
+    return recipe_id or None
+
+
+def forget(recipe_id):
+    """Сбрасывает запись о ссылке рецепта в кеше процесса."""
+    links.delete(ShortLink.make_slug(recipe_id))
+
+
+class ClickCounter:
+    """Буфер счётчиков переходов с отложенной записью в базу."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, recipe_id):
+        with self._lock:
+            self._counts[recipe_id] += 1
+            self._pending += 1
+            if self._pending >= settings.SHORT_LINK_FLUSH_SIZE:
+                self._wakeup.set()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='foodgram-clicks', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.SHORT_LINK_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+            close_old_connections()
+
+    def flush(self):
+        """Записывает накопленные переходы.
+
+        Рецепты с одинаковым приростом обновляются одним запросом.
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._pending = 0
+        if not counts:
+            return
+        by_increment = defaultdict(list)
+        for recipe_id, increment in counts.items():
+            by_increment[increment].append(recipe_id)
+        for increment, recipe_ids in by_increment.items():
+            try:
+                ShortLink.objects.filter(recipe_id__in=recipe_ids).update(
+                    clicks=F('clicks') + increment)
+            except Exception:
+                logger.exception('Не удалось сохранить переходы по ссылкам')
+                with self._lock:
+                    self._counts.update(dict.fromkeys(recipe_ids, increment))
+
+
+clicks = ClickCounter()
+atexit.register(clicks.flush)
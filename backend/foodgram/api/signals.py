@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_tokens
+from api import recipe_cache, short_links
+from api.jwt_auth import revocation_list
+from foodgram import replica_pin
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Token)
+def pin_new_token(sender, instance, created, **kwargs):
+    """Закрепляет новый токен за основной базой после входа."""
+    if created:
+        replica_pin.pin_token(instance.key)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Сбрасывает кеш токена после выхода."""
+    invalidate_tokens(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Сбрасывает кеш токенов после изменения пользователя.
+
+    Покрывает смену пароля, деактивацию и изменение профиля.
+    """
+    if created:
+        return
+    keys = list(Token.objects.filter(user=instance)
+                .values_list('key', flat=True))
+    if keys:
+        invalidate_tokens(*keys)
+
+
+@receiver(post_save, sender=User)
+def revoke_user_jwt(sender, instance, created, **kwargs):
+    """Отзывает JWT пользователя после смены пароля или деактивации.
+
+    Новый пароль виден только до конца save(): AbstractBaseUser хранит
+    его в _password и сбрасывает после сохранения.
+    """
+    if created or not settings.JWT_AUTH_ENABLED:
+        return
+    if instance._password is not None or not instance.is_active:
+        revocation_list.revoke_user(instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def forget_short_link(sender, instance, **kwargs):
+    """Сбрасывает кеш короткой ссылки при создании и удалении рецепта.
+
+    Новый рецепт мог быть закеширован как отсутствующий. Кеши других
+    процессов устаревают не дольше чем за SHORT_LINK_CACHE_TTL секунд.
+    """
+    if kwargs.get('created', True):
+        short_links.forget(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_cached_recipe(sender, instance, **kwargs):
+    """Сбрасывает кеш рецепта после фиксации его изменения."""
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    transaction.on_commit(
+        lambda: recipe_cache.invalidate_recipes(recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_cached_recipe_tags(sender, instance, action, reverse,
+                                  **kwargs):
+    """Сбрасывает кеш рецепта или всех рецептов при изменении тегов."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        transaction.on_commit(recipe_cache.invalidate_catalog)
+    else:
+        recipe_id = instance.pk
+        transaction.on_commit(
+            lambda: recipe_cache.invalidate_recipes(recipe_id))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_cached_catalog(sender, **kwargs):
+    """Сбрасывает кеш всех рецептов после изменения справочников."""
+    transaction.on_commit(recipe_cache.invalidate_catalog)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, created, update_fields,
+                              **kwargs):
+    """Сбрасывает кеш рецептов автора после изменения его профиля.
+
+    Вход пользователя меняет только last_login и кеш не трогает.
+    """
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    recipe_ids = list(Recipe.objects.filter(author=instance)
+                      .values_list('pk', flat=True))
+    if recipe_ids:
+        transaction.on_commit(
+            lambda: recipe_cache.invalidate_recipes(*recipe_ids))
@@ -0,0 +1,48 @@
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.authentication import local_tokens
+from users.models import User
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Кеш токенов сбрасывается при выходе и не живёт в LocMemCache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='pass',
+            first_name='Имя', last_name='Фамилия')
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.client = APIClient()
+        response = self.client.post(
+            '/api/auth/token/login/',
+            {'email': 'user@example.com', 'password': 'pass'})
+        self.key = response.data['auth_token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+    def test_logout_invalidates_token(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.assertEqual(
+            self.client.post('/api/auth/token/logout/').status_code, 204)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_process_local_cache_is_not_used_as_shared_tier(self):
+        self.client.get('/api/users/me/')
+        self.assertIsNone(cache.get(f'auth_token:{self.key}'))
+
+    def test_shared_cache_is_used_as_second_tier(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}):
+                self.client.get('/api/users/me/')
+                self.assertIsNotNone(cache.get(f'auth_token:{self.key}'))
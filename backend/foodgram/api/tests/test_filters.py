@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart)
+from users.models import User
+
+
+class RecipeRelationFiltersTest(TestCase):
+    """is_favorited и is_in_shopping_cart фильтруют через EXISTS."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='pass')
+        ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г')
+        for number in range(4):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png')
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=1)
+            if number % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_list(self, params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def assert_semijoin(self, params, table):
+        response, queries = self.get_list(params)
+        self.assertEqual(response.data['count'], 2)
+        self.assertTrue(all(recipe['is_favorited']
+                            for recipe in response.data['results']))
+        # Подсчёт, страница и предвыборки тегов, строк ингредиентов
+        # и самих ингредиентов; флаги и подписка ― в запросе страницы.
+        self.assertEqual(len(queries), 5)
+        page = queries[1]['sql']
+        self.assertIn(f'EXISTS(SELECT (1) AS "a" FROM "{table}"', page)
+        self.assertNotIn(f'JOIN "{table}"', page)
+
+    def test_is_favorited(self):
+        self.assert_semijoin({'is_favorited': 1}, 'recipes_favorite')
+
+    def test_is_in_shopping_cart(self):
+        self.assert_semijoin({'is_in_shopping_cart': 1},
+                             'recipes_shoppingcart')
+
+    def test_query_count_does_not_grow_with_page(self):
+        _, queries = self.get_list({'limit': 1})
+        _, more_queries = self.get_list({'limit': 4})
+        self.assertEqual(len(queries), len(more_queries))
+
+    def test_facets_skip_flag_annotations(self):
+        response, queries = self.get_list({'facets': 1, 'is_favorited': 1})
+        self.assertEqual(response.data['facets']['cooking_time']['0-15'], 2)
+        self.assertEqual(response.data['facets']['authors'],
+                         [{'id': self.user.pk, 'username': 'user',
+                           'count': 2}])
+        facets = [query['sql'] for query in queries[-2:]]
+        for sql in facets:
+            # Только условие фильтра, без флагов пользователя и подписки.
+            self.assertEqual(sql.count('EXISTS'), 1)
+            self.assertNotIn('recipes_shoppingcart', sql)
+            self.assertNotIn('users_subscription', sql)
@@ -0,0 +1,72 @@
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from api import imports
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImportImagesTest(TestCase):
+    """Повторная вставка при импорте не оставляет лишних файлов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def line(self, name):
+        return json.dumps({
+            'name': name, 'text': 'Текст', 'cooking_time': 10,
+            'image': image(), 'tags': [self.tag.pk],
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 100}],
+        })
+
+    def stored_files(self):
+        return sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(MEDIA_ROOT) for name in names)
+
+    def test_retry_reuses_saved_image(self):
+        insert = imports._insert
+
+        def failing_insert(author, rows):
+            recipes = insert(author, rows)
+            if any(row['name'] == 'Сломанный' for row in rows):
+                raise DatabaseError('сбой вставки')
+            return recipes
+
+        with mock.patch.object(imports, '_insert', failing_insert):
+            report = imports.import_recipes(
+                self.author, [self.line('Блины'), self.line('Сломанный')])
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'][0]['line'], 2)
+        recipe = Recipe.objects.get(author=self.author)
+        self.assertEqual(self.stored_files(), [recipe.image.path])
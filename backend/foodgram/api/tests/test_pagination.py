@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.pagination import CountedPaginator
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Favorite, Ingredient, Recipe, RecipeIngredient
+from users.models import User
+
+
+class ByIngredientsPaginationTest(TestCase):
+    """Пагинация списка id из индекса ингредиентов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+        cls.salt = Ingredient.objects.create(
+            name='соль', measurement_unit='г')
+        cls.flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г')
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png')
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=cls.salt, amount=1)
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index._version = None
+
+    def test_by_ingredients_is_paginated(self):
+        response = APIClient().get(
+            '/api/recipes/by_ingredients/',
+            {'ingredients': f'{self.salt.pk},{self.flour.pk}', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertFalse(response.data['count_approximate'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+
+class PaginationCountTest(TestCase):
+    """Число объектов и страница не отстают от записей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='pass')
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png')
+            for number in range(3)
+        ]
+        for recipe in cls.recipes[:2]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_favorites(self):
+        response = self.client.get('/api/recipes/', {'is_favorited': 1})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_write_is_visible_on_next_request(self):
+        self.assertEqual(self.get_favorites()['count'], 2)
+        response = self.client.post(
+            f'/api/recipes/{self.recipes[2].pk}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        data = self.get_favorites()
+        self.assertEqual(data['count'], 3)
+        self.assertFalse(data['count_approximate'])
+        self.assertEqual(len(data['results']), 3)
+
+    def test_page_is_not_cut_by_stale_count(self):
+        paginator = CountedPaginator(list(range(5)), 2, count=3)
+        self.assertEqual(list(paginator.page(2)), [2, 3])
@@ -0,0 +1,62 @@
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import User
+
+
+class RecipeCacheTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Текст', cooking_time=10,
+            image='recipes/images/recipe.png')
+        cls.url = f'/api/recipes/{cls.recipe.pk}/'
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+
+# Алиаса нет в DATABASES: любое чтение, ушедшее на «реплику», упадёт.
+@override_settings(DATABASE_REPLICAS=['replica_lagging'])
+class RecipeCacheReplicaTest(RecipeCacheTestCase):
+    """Запись кеша рецепта собирается из основной базы."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        shared_cache = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.cache_dir.name,
+        }})
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+        super().setUp()
+
+    def test_miss_reads_primary_and_hit_skips_database(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Рецепт')
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.json(), response.json())
+
+
+class ProcessLocalRecipeCacheTest(RecipeCacheTestCase):
+    """С кешем процесса рецепт всегда читается из базы."""
+
+    def test_cache_is_not_used(self):
+        self.client.get(self.url)
+        self.assertEqual(cache.get_many(
+            [f'recipe_cache:stamp:{self.recipe.pk}']), {})
+        # Изменение из другого воркера не сбрасывает метки этого процесса.
+        Recipe.objects.filter(pk=self.recipe.pk).update(name='Новое')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['name'], 'Новое')
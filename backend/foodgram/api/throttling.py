@@ -0,0 +1,72 @@
+"""Ограничение частоты дорогих запросов.
+
+Для каждого пользователя (или IP анонима) хранится корзина токенов:
+пара (число токенов, время обновления) в общем кеше, поэтому лимит
+общий для всех воркеров, а память на ключ не зависит от лимита, в
+отличие от истории запросов SimpleRateThrottle. Лимит 'N/период' ―
+корзина на N запросов, пополняемая по N токенов за период. При отказе
+в ответе есть Retry-After: через сколько секунд появится токен.
+
+Чтение и запись корзины не атомарны: при одновременных запросах одного
+клиента из разных воркеров лишний запрос может пройти. Для защиты от
+перегрузки этого достаточно, а запрос обходится одним get и одним set.
+"""
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Корзина токенов по пользователю, для анонимов ― по IP."""
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+    tokens = 0
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        self.tokens = min(
+            self.num_requests,
+            tokens + (now - updated) * self.num_requests / self.duration)
+        if self.tokens < 1:
+            return False
+        # Через duration корзина снова полная, запись больше не нужна.
+        self.cache.set(self.key, (self.tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class ShoppingCartThrottle(TokenBucketThrottle):
+    scope = 'shopping_cart'
+
+
+class RecipeSearchThrottle(TokenBucketThrottle):
+    """Ограничивает только запросы списка рецептов с параметром search."""
+
+    scope = 'recipe_search'
+
+    def allow_request(self, request, view):
+        if not request.query_params.get('search'):
+            return True
+        return super().allow_request(request, view)
+
+
+class RegistrationThrottle(TokenBucketThrottle):
+    scope = 'registration'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)}
@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from api.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
+                       UserViewSet, jwt_create, jwt_logout, jwt_refresh)
 
 router = routers.DefaultRouter()
 router.register('users', UserViewSet, basename='user')
@@ -13,3 +15,10 @@ urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
     path('', include(router.urls)),
 ]
+
+if settings.JWT_AUTH_ENABLED:
+    urlpatterns.insert(0, path('auth/jwt/', include([
+        path('create/', jwt_create, name='jwt-create'),
+        path('refresh/', jwt_refresh, name='jwt-refresh'),
+        path('logout/', jwt_logout, name='jwt-logout'),
+    ])))
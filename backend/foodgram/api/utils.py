@@ -1,17 +1,16 @@
-from django.conf import settings
 from django.shortcuts import redirect
 
-from recipes.models import hashids
+from api import short_links
+
+
+def recipe_redirect(recipe_id):
+    """Перенаправляет на рецепт и учитывает переход."""
+    if recipe_id is None:
+        return redirect('/')
+    short_links.clicks.add(recipe_id)
+    return redirect(f'/recipes/{recipe_id}/')
 
 
 def redirect_to_recipe(request, short_id):
     """Перенаправляет на полный URL рецепта по короткой ссылке."""
-    try:
-        decoded = hashids.decode(short_id)
-        if not decoded:
-            return redirect(settings.HOST)
-
-        recipe_id = decoded[0]
-        return redirect(f'/recipes/{recipe_id}/')
-    except Exception:
-        return redirect(settings.HOST)
+    return recipe_redirect(short_links.resolve(short_id))
@@ -1,19 +1,39 @@
 from django.contrib.auth import get_user_model
 from django.db.models import (BooleanField, Count, Exists, OuterRef, Sum,
                               Value)
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.text import compress_sequence
 from django_filters.rest_framework import DjangoFilterBackend
-from djoser.serializers import SetPasswordSerializer
-from rest_framework import filters, pagination, permissions, response, status
-from rest_framework.decorators import action
+from djoser.serializers import SetPasswordSerializer, TokenCreateSerializer
+from rest_framework import filters, permissions, response, status
+from rest_framework.decorators import (action, api_view,
+                                       authentication_classes,
+                                       permission_classes)
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
 
-from api import serializers
+from api import recipe_cache, serializers
+from api.exports import iter_catalog, iter_recipe_book
 from api.filters import IngredientFilter, RecipeFilter
+from api.imports import import_recipes
+from api.jwt_auth import RefreshToken, revocation_list
+from api.pagination import CountCachedLimitOffsetPagination
 from api.permissions import IsAuthorOrReadOnly
+from api.throttling import (RecipeSearchThrottle, RegistrationThrottle,
+                            ShoppingCartThrottle)
+from foodgram.caches import is_shared_cache
+from foodgram.db_router import use_replica
+from recipes.facets import get_facets
+from recipes.feed import get_feed_queryset
+from recipes.ingredient_index import ingredient_index
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+                            ShoppingCart, ShortLink, Tag)
 from users.models import Subscription
 
 User = get_user_model()
@@ -28,7 +48,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
-    pagination_class = pagination.LimitOffsetPagination
+    pagination_class = CountCachedLimitOffsetPagination
     filter_backends = (filters.SearchFilter,)
     search_fields = ('^username', '^email')
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
@@ -39,6 +59,13 @@ class UserViewSet(viewsets.ModelViewSet):
                 if self.action == 'create'
                 else serializers.UserSerializer)
 
+    def get_throttles(self):
+        """Регистрация ограничена по IP: хеширование пароля дорогое."""
+        throttles = super().get_throttles()
+        if self.action == 'create':
+            throttles.append(RegistrationThrottle())
+        return throttles
+
     @action(detail=False, methods=['get'], url_path='me',
             permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
@@ -123,7 +150,7 @@ class UserViewSet(viewsets.ModelViewSet):
         methods=['get'],
         url_path='subscriptions',
         permission_classes=[permissions.IsAuthenticated],
-        pagination_class=pagination.LimitOffsetPagination,
+        pagination_class=CountCachedLimitOffsetPagination,
     )
     def subscriptions(self, request):
         """Получает подписки текущего пользователя."""
@@ -176,6 +203,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
     """Полный CRUD для рецептов.
 
     Доп. экшены: избранное, корзина, короткая ссылка, выгрузка корзины.
+    С параметром facets=true список дополняется счётчиками по тегам,
+    времени приготовления и авторам для текущих фильтров.
     """
 
     serializer_class = serializers.RecipeSerializer
@@ -186,6 +215,66 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filterset_class = RecipeFilter
     search_fields = ('name', 'text')
 
+    def list(self, request, *args, **kwargs):
+        """Список рецептов, при необходимости со счётчиками фильтров."""
+        result = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets') in ('1', 'true', 'True'):
+            result.data['facets'] = get_facets(
+                self.filter_queryset(self.get_queryset()))
+        return result
+
+    def retrieve(self, request, *args, **kwargs):
+        """Рецепт с флагами текущего пользователя.
+
+        Публичная часть берётся из recipe_cache, а флаги избранного,
+        корзины и подписки на автора считаются одним запросом. При
+        промахе рецепт читается из основной базы: отставшая реплика
+        попала бы в кеш под новой меткой и отдавалась бы всем. Метки
+        сброса видны другим воркерам только в общем кеше, поэтому с
+        кешем процесса recipe_cache не используется.
+        """
+        if not kwargs['pk'].isdigit():
+            raise Http404
+        if not is_shared_cache():
+            return super().retrieve(request, *args, **kwargs)
+        pk = int(kwargs['pk'])
+        base_url = request.build_absolute_uri('/')
+        data, stamps = recipe_cache.lookup(pk, base_url)
+        if data is None:
+            token = use_replica.set(False)
+            try:
+                result = super().retrieve(request, *args, **kwargs)
+            finally:
+                use_replica.reset(token)
+            recipe_cache.store(pk, base_url, stamps, result.data)
+            return result
+        user = request.user
+        if not user.is_authenticated:
+            return response.Response(data)
+        flags = (
+            Recipe.objects.filter(pk=pk)
+            .annotate(
+                is_favorited=Exists(Favorite.objects.filter(
+                    user=user, recipe=OuterRef('pk'))),
+                is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                    user=user, recipe=OuterRef('pk'))),
+                is_subscribed=Exists(Subscription.objects.filter(
+                    user=user, author=OuterRef('author_id'))))
+            .values_list('is_favorited', 'is_in_shopping_cart',
+                         'is_subscribed')
+            .first()
+        )
+        if flags is None:
+            raise Http404
+        return response.Response(recipe_cache.personalize(data, *flags))
+
+    def get_throttles(self):
+        """Полнотекстовый поиск по списку рецептов ограничен по частоте."""
+        throttles = super().get_throttles()
+        if self.action == 'list':
+            throttles.append(RecipeSearchThrottle())
+        return throttles
+
     def toggle_relation(
         self,
         relation_model,
@@ -242,16 +331,84 @@ class RecipeViewSet(viewsets.ModelViewSet):
             pk=pk,
         )
 
+    @action(detail=False, methods=['get'], url_path='feed',
+            permission_classes=[permissions.IsAuthenticated])
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        queryset = self.filter_queryset(
+            get_feed_queryset(request.user, self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='trending',
+            permission_classes=[permissions.AllowAny])
+    def trending(self, request):
+        """Популярные рецепты по недавним добавлениям в избранное и корзину."""
+        queryset = self.filter_queryset(
+            self.get_queryset()
+            .filter(trending__isnull=False)
+            .order_by('-trending__score'))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='by_ingredients',
+            permission_classes=[permissions.AllowAny])
+    def by_ingredients(self, request):
+        """Рецепты из имеющихся ингредиентов.
+
+        Рецепты ранжируются по доле ингредиентов, которые есть у
+        пользователя. Ингредиенты передаются в параметре ingredients
+        через запятую или несколькими параметрами.
+        """
+        try:
+            ingredient_ids = [
+                int(pk)
+                for value in request.query_params.getlist('ingredients')
+                for pk in value.split(',') if pk
+            ]
+        except ValueError:
+            ingredient_ids = None
+        if not ingredient_ids:
+            return response.Response(
+                {'ingredients': 'Укажите id имеющихся ингредиентов.'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.paginate_queryset(ingredient_index.search(ingredient_ids))
+        recipes = Recipe.objects.in_bulk(page)
+        serializer = serializers.ShortRecipeSerializer(
+            [recipes[pk] for pk in page if pk in recipes],
+            many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path='similar',
+            permission_classes=[permissions.AllowAny])
+    def similar(self, request, pk=None):
+        """Рецепты с похожим набором ингредиентов."""
+        queryset = (Recipe.objects
+                    .filter(similar_for__recipe_id=pk)
+                    .order_by('-similar_for__score'))
+        serializer = serializers.ShortRecipeSerializer(
+            queryset, many=True, context={'request': request})
+        return response.Response(serializer.data, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['get'], url_path='get-link',
             permission_classes=[permissions.AllowAny])
     def get_link(self, request, pk=None):
-        """Получение короткой ссылки на рецепт."""
-        recipe = get_object_or_404(Recipe, pk=pk)
-        return response.Response({'short-link': recipe.get_short_url()},
+        """Получение короткой ссылки на рецепт.
+
+        Ссылка вычисляется из id без обращения к базе; существование
+        рецепта проверяется при переходе по ней.
+        """
+        if not pk.isdigit():
+            raise Http404
+        return response.Response({'short-link': ShortLink.build_url(int(pk))},
                                  status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='download_shopping_cart',
-            permission_classes=[permissions.IsAuthenticated])
+            permission_classes=[permissions.IsAuthenticated],
+            throttle_classes=[ShoppingCartThrottle])
     def download_shopping_cart(self, request):
         """Выгрузка списка покупок."""
         ingredients_queryset = (
@@ -272,6 +429,58 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         return response
 
+    @action(detail=False, methods=['get'], url_path='export',
+            permission_classes=[permissions.IsAuthenticated])
+    def export(self, request):
+        """Выгрузка всех рецептов пользователя в ZIP-архиве."""
+        response = StreamingHttpResponse(
+            iter_recipe_book(request.user), content_type='application/zip')
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.zip"'
+        )
+        return response
+
+    @action(detail=False, methods=['get'], url_path='catalog',
+            permission_classes=[permissions.IsAdminUser])
+    def catalog(self, request):
+        """Выгрузка всего каталога рецептов в NDJSON для персонала.
+
+        ?since=<ISO 8601> ― только рецепты, изменённые после этого
+        момента. Ответ сжимается gzip, если клиент его принимает.
+        """
+        since = request.query_params.get('since')
+        if since is not None:
+            since = parse_datetime(since)
+            if since is None:
+                raise ValidationError(
+                    {'since': 'Ожидается дата и время в формате ISO 8601.'})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        content = iter_catalog(since)
+        gzipped = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if gzipped:
+            content = compress_sequence(content)
+        response = StreamingHttpResponse(
+            content, content_type='application/x-ndjson')
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import',
+            permission_classes=[permissions.IsAuthenticated])
+    def import_recipes(self, request):
+        """Массовый импорт рецептов пользователя из NDJSON.
+
+        Каждая строка тела запроса ― рецепт в формате создания рецепта.
+        В ответе ― id созданных рецептов и ошибки по номерам строк.
+        """
+        report = import_recipes(request.user, request.stream or ())
+        return response.Response(
+            report,
+            status=(status.HTTP_201_CREATED if report['created']
+                    else status.HTTP_400_BAD_REQUEST))
+
     @staticmethod
     def build_shopping_list(ingredients_qs):
         """Сборка списка покупок."""
@@ -299,7 +508,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Получение списка рецептов.
 
         Аннотируем рецепты с информацией о том, добавлен ли рецепт в
-        избранное и корзину.
+        избранное и корзину и подписан ли пользователь на автора.
         """
         queryset = (
             Recipe.objects.select_related(
@@ -312,11 +521,65 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 user=user, recipe=OuterRef('pk'))
             carted = ShoppingCart.objects.filter(
                 user=user, recipe=OuterRef('pk'))
+            subscribed = Subscription.objects.filter(
+                user=user, author=OuterRef('author_id'))
             queryset = queryset.annotate(
                 is_favorited=Exists(favorited),
-                is_in_shopping_cart=Exists(carted))
+                is_in_shopping_cart=Exists(carted),
+                author_is_subscribed=Exists(subscribed))
         else:
             queryset = queryset.annotate(
                 is_favorited=Value(False, output_field=BooleanField()),
                 is_in_shopping_cart=Value(False, output_field=BooleanField()))
         return queryset
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def jwt_create(request):
+    """Выдаёт пару access/refresh-токенов по email и паролю."""
+    serializer = TokenCreateSerializer(
+        data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    refresh = RefreshToken.for_user(serializer.user)
+    return response.Response(
+        {'access': str(refresh.access_token), 'refresh': str(refresh)},
+        status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def jwt_refresh(request):
+    """Обменивает refresh-токен на новую пару токенов.
+
+    Старый refresh-токен отзывается, данные пользователя в новых токенах
+    берутся из базы.
+    """
+    serializer = serializers.JWTRefreshSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    token = serializer.validated_data['refresh']
+    user = User.objects.filter(
+        pk=token[jwt_settings.USER_ID_CLAIM], is_active=True).first()
+    if user is None:
+        return response.Response(
+            {'refresh': ['Пользователь не найден или деактивирован.']},
+            status=status.HTTP_401_UNAUTHORIZED)
+    revocation_list.revoke_token(token)
+    refresh = RefreshToken.for_user(user)
+    return response.Response(
+        {'access': str(refresh.access_token), 'refresh': str(refresh)},
+        status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def jwt_logout(request):
+    """Отзывает refresh-токен и текущий access-токен."""
+    serializer = serializers.JWTRefreshSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    revocation_list.revoke_token(serializer.validated_data['refresh'])
+    if isinstance(request.auth, AccessToken):
+        revocation_list.revoke_token(request.auth)
+    return response.Response(status=status.HTTP_204_NO_CONTENT)
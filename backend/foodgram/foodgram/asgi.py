@@ -1,7 +1,8 @@
 import os
 
-from django.core.asgi import get_asgi_application
+from foodgram.handlers import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+os.environ.setdefault('SERVER_MODE', 'asgi')
 
 application = get_asgi_application()
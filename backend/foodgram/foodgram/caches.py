@@ -0,0 +1,15 @@
+"""Сведения о настроенном кеше."""
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+
+# Бэкенды, у которых каждый процесс видит только свои записи.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias=DEFAULT_CACHE_ALIAS):
+    """Видят ли записи кеша все процессы (Redis, Memcached, база)."""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
@@ -0,0 +1,25 @@
+"""Проверки конфигурации инфраструктуры (manage.py check)."""
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+from foodgram.caches import is_shared_cache
+
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Реплики требуют общего кеша для закрепления за основной базой.
+
+    Отметка о записи, сделанной в одном воркере, должна быть видна
+    остальным, иначе следующий GET клиента уйдёт на реплику и может не
+    увидеть его же изменений.
+    """
+    if not settings.DATABASE_REPLICAS or is_shared_cache():
+        return []
+    return [Error(
+        'Реплики базы данных настроены, а кеш виден только одному '
+        'процессу.',
+        hint='Задайте общий CACHE_BACKEND (memcached, Redis, файловый '
+             'или кеш в базе данных).',
+        id='foodgram.E001',
+    )]
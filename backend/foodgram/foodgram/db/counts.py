@@ -0,0 +1,52 @@
+"""Приблизительный подсчёт строк.
+
+Точный COUNT(*) по большой таблице в PostgreSQL читает её целиком.
+Для таблицы без фильтров берётся статистика pg_class.reltuples, для
+запроса с фильтрами ― оценка числа строк из плана EXPLAIN. Оценки
+обновляются ANALYZE/autovacuum и могут отличаться от точного значения.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """Оценка числа строк queryset или None, если СУБД её не даёт."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # -1 или 0: таблица ещё не анализировалась.
+            return row[0] if row and row[0] > 0 else None
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который для больших выборок не считает строки точно.
+
+    Если оценка не меньше ESTIMATED_COUNT_THRESHOLD, число страниц
+    считается по ней; небольшие выборки считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if (estimate is not None
+                and estimate >= settings.ESTIMATED_COUNT_THRESHOLD):
+            return estimate
+        return super().count
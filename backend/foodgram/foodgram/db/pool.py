@@ -0,0 +1,136 @@
+"""Пул соединений с базой данных в памяти процесса.
+
+Нужен для потоковых воркеров: вместо соединения на каждый поток
+процесс держит не больше POOL_SIZE соединений, а потоки ждут
+свободное. Время ожидания собирается в статистику и пишется в лог.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+STATS_LOG_EVERY = 1000
+
+
+class ConnectionPool:
+
+    def __init__(self, alias, size, timeout, wait_warning):
+        self.alias = alias
+        self.size = size
+        self.timeout = timeout
+        self.wait_warning = wait_warning
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.stats = {
+            'acquired': 0,
+            'created': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'in_use': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+
+    def _record_wait(self, wait):
+        with self._lock:
+            stats = self.stats
+            stats['acquired'] += 1
+            stats['in_use'] += 1
+            stats['wait_total'] += wait
+            stats['wait_max'] = max(stats['wait_max'], wait)
+            acquired = stats['acquired']
+        if wait >= self.wait_warning:
+            logger.warning('Ожидание соединения %s из пула: %.3f с',
+                           self.alias, wait)
+        if acquired % STATS_LOG_EVERY == 0:
+            logger.info('Пул соединений %s: %s', self.alias, self.get_stats())
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['idle'] = self._idle.qsize()
+        stats['wait_avg'] = (stats['wait_total'] / stats['acquired']
+                             if stats['acquired'] else 0.0)
+        return stats
+
+    def acquire(self, connect, check):
+        """Выдаёт соединение, дожидаясь свободного не дольше timeout.
+
+        Свободное соединение проверяется функцией check, новое
+        открывается функцией connect.
+        """
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count('timeouts')
+            raise OperationalError(
+                f'Нет свободных соединений в пуле {self.alias} '
+                f'за {self.timeout} с.')
+        self._record_wait(time.monotonic() - started)
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if check(connection):
+                    return connection
+                self._discard(connection)
+            self._count('created')
+            return connect()
+        except Exception:
+            self._release_slot()
+            raise
+
+    def release(self, connection):
+        """Возвращает соединение в пул, откатив незавершённую транзакцию."""
+        try:
+            if connection.closed:
+                raise OperationalError('Соединение закрыто.')
+            connection.rollback()
+        except Exception:
+            self._discard(connection)
+        else:
+            self._idle.put(connection)
+        finally:
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._lock:
+            self.stats['in_use'] -= 1
+        self._slots.release()
+
+    def _discard(self, connection):
+        self._count('discarded')
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, **kwargs):
+    """Пул соединений для псевдонима базы, создаётся при первом запросе."""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(alias, **kwargs)
+        return _pools[alias]
+
+
+def get_pools_stats():
+    """Статистика всех пулов процесса."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.alias: pool.get_stats() for pool in pools}
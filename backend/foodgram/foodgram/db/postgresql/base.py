@@ -0,0 +1,81 @@
+"""PostgreSQL с проверкой постоянных соединений и пулом.
+
+Дополнительные ключи в настройках базы:
+    CONN_HEALTH_CHECKS - проверять постоянное соединение перед первым
+        использованием в запросе и переподключаться, если оно сломано;
+    POOL_SIZE - размер пула соединений процесса (0 ― без пула);
+    POOL_TIMEOUT - сколько секунд ждать свободное соединение;
+    POOL_WAIT_WARNING - время ожидания, после которого пишется
+        предупреждение в лог.
+"""
+
+from django.db.backends.postgresql import base
+
+from foodgram.db.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    @property
+    def pool(self):
+        if not self.settings_dict.get('POOL_SIZE'):
+            return None
+        return get_pool(
+            self.alias,
+            size=self.settings_dict['POOL_SIZE'],
+            timeout=self.settings_dict.get('POOL_TIMEOUT', 10),
+            wait_warning=self.settings_dict.get('POOL_WAIT_WARNING', 0.1),
+        )
+
+    def _is_connection_usable(self, connection):
+        if connection.closed:
+            return False
+        if not self.health_check_enabled:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.acquire(
+            connect=lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params),
+            check=self._is_connection_usable,
+        )
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        pool.release(self.connection)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        if (self.connection is not None
+                and self.health_check_enabled
+                and not self.health_check_done):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
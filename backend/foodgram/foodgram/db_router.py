@@ -0,0 +1,27 @@
+"""Маршрутизация запросов между основной базой и репликами.
+
+Чтение уходит на реплику, только если ReplicaRoutingMiddleware
+разрешила это для текущего запроса. Во всех остальных случаях
+(запись, фоновые задачи, команды) используется основная база.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+use_replica = ContextVar('use_replica', default=False)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and use_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
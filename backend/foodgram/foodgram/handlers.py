@@ -0,0 +1,114 @@
+"""WSGI/ASGI-обработчики с облегчённым набором middleware для API.
+
+API аутентифицируется только токенами, поэтому сессии, CSRF, сообщения
+и защита от clickjacking ему не нужны. Запросы к API_MIDDLEWARE_PATHS
+проходят через цепочку из API_MIDDLEWARE, остальные (админка, короткие
+ссылки) ― через полный MIDDLEWARE.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.handlers import asgi, base, wsgi
+from django.db import connections
+
+
+class APIMiddlewareMixin:
+    api_handler = None
+
+    def load_middleware(self, is_async=False):
+        super().load_middleware(is_async)
+        if settings.API_MIDDLEWARE is None:
+            return
+        # Отдельный обработчик, чтобы у цепочек были свои списки
+        # process_view/process_exception. BaseHandler читает список
+        # middleware только из settings, поэтому он подменяется на время
+        # сборки цепочки; это происходит однократно при старте процесса.
+        self.api_handler = base.BaseHandler()
+        middleware = settings.MIDDLEWARE
+        settings.MIDDLEWARE = settings.API_MIDDLEWARE
+        try:
+            self.api_handler.load_middleware(is_async)
+        finally:
+            settings.MIDDLEWARE = middleware
+
+    def is_api_request(self, request):
+        return (self.api_handler is not None
+                and request.path_info.startswith(
+                    settings.API_MIDDLEWARE_PATHS))
+
+
+class WSGIHandler(APIMiddlewareMixin, wsgi.WSGIHandler):
+    def get_response(self, request):
+        if self.is_api_request(request):
+            return self.api_handler.get_response(request)
+        return super().get_response(request)
+
+
+class ASGIHandler(APIMiddlewareMixin, asgi.ASGIHandler):
+    async def get_response_async(self, request):
+        if self.is_api_request(request):
+            return await self.api_handler.get_response_async(request)
+        return await super().get_response_async(request)
+
+    async def send_response(self, response, send):
+        """Отправляет потоковые ответы, перебирая их вне цикла событий.
+
+        Django 3.2 перебирает StreamingHttpResponse прямо в цикле событий,
+        и генераторы, читающие из базы, падают с SynchronousOnlyOperation.
+        Части ответа забираются в отдельном потоке, одном на весь ответ,
+        чтобы серверный курсор оставался на своём соединении.
+        """
+        if not response.streaming:
+            return await super().send_response(response, send)
+        response_headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            response_headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            response_headers.append(
+                (b'Set-Cookie',
+                 cookie.output(header='').encode('ascii').strip()))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers,
+        })
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=1)
+        parts = iter(response)
+        try:
+            while True:
+                part = await loop.run_in_executor(executor, next, parts, None)
+                if part is None:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body'})
+        finally:
+            await loop.run_in_executor(executor, self._close, response)
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _close(response):
+        response.close()
+        connections.close_all()
+
+
+def get_wsgi_application():
+    django.setup(set_prefix=False)
+    return WSGIHandler()
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return ASGIHandler()
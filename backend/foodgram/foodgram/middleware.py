@@ -0,0 +1,73 @@
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.core.cache import cache
+
+from foodgram import replica_pin
+from foodgram.db_router import use_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет чтение API на реплики.
+
+    После запроса на запись клиент на REPLICA_PIN_SECONDS закрепляется за
+    основной базой, чтобы сразу видеть свои изменения, несмотря на
+    задержку репликации (см. foodgram.replica_pin). Здесь проверяется
+    отметка по заголовку Authorization, сессии или IP клиента, отметку
+    по пользователю проверяет аутентификация.
+
+    В ASGI-режиме работает асинхронно: синхронное middleware Django
+    выполняло бы весь запрос в одном общем потоке, и запросы к API
+    шли бы строго по очереди.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _is_routed(request):
+        return (settings.DATABASE_REPLICAS
+                and request.path.startswith(settings.REPLICA_PATHS))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._is_routed(request):
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            replica_pin.pin_writer(request)
+            return response
+
+        pinned = cache.get(replica_pin.request_key(request))
+        token = use_replica.set(not pinned)
+        try:
+            return self.get_response(request)
+        finally:
+            use_replica.reset(token)
+
+    async def __acall__(self, request):
+        if not self._is_routed(request):
+            return await self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            await sync_to_async(
+                replica_pin.pin_writer, thread_sensitive=False)(request)
+            return response
+
+        pinned = await sync_to_async(cache.get, thread_sensitive=False)(
+            replica_pin.request_key(request))
+        token = use_replica.set(not pinned)
+        try:
+            return await self.get_response(request)
+        finally:
+            use_replica.reset(token)
@@ -0,0 +1,69 @@
+"""Закрепление клиента за основной базой после записи.
+
+После запроса на запись клиент REPLICA_PIN_SECONDS секунд читает из
+основной базы, чтобы видеть свои изменения, несмотря на задержку
+репликации. Аутентифицированный клиент закрепляется по id пользователя:
+отметку проверяет аутентификация после того, как пользователь найден.
+Выданный токен закрепляется сам, иначе первый запрос с ним искал бы
+токен на реплике, где его ещё нет. Аноним закрепляется по cookie сессии
+или по IP клиента с учётом NUM_PROXIES: по REMOTE_ADDR за прокси все
+анонимы были бы одним клиентом.
+
+Отметки хранятся в общем кеше, чтобы их видели все воркеры; это
+требование проверяет foodgram.checks.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from foodgram.db_router import use_replica
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def user_key(user_id):
+    return f'replica_pin:user:{user_id}'
+
+
+def credentials_key(authorization):
+    return f'replica_pin:auth:{_digest(authorization)}'
+
+
+def request_key(request):
+    """Ключ клиента до аутентификации: заголовок, сессия или IP."""
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        return credentials_key(authorization)
+    identity = (request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+                or BaseThrottle().get_ident(request))
+    return f'replica_pin:anon:{_digest(identity)}'
+
+
+def pin(key):
+    cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+
+
+def pin_writer(request):
+    """Закрепляет за основной базой клиента, выполнившего запись."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        pin(user_key(user.pk))
+    else:
+        pin(request_key(request))
+
+
+def pin_token(key):
+    """Закрепляет новый токен: запрос с ним найдёт токен в основной базе."""
+    if settings.DATABASE_REPLICAS:
+        pin(credentials_key(f'Token {key}'))
+
+
+def route_user(user_id):
+    """Переводит чтение запроса на основную базу, если клиент писал."""
+    if use_replica.get() and cache.get(user_key(user_id)):
+        use_replica.set(False)
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
@@ -32,10 +33,12 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -44,7 +47,20 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'foodgram.urls'
+# Укороченный набор middleware для API (см. foodgram.handlers).
+API_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+if os.getenv('LEAN_API_MIDDLEWARE', 'True') != 'True':
+    API_MIDDLEWARE = None
+API_MIDDLEWARE_PATHS = ('/api/',)
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
+ROOT_URLCONF = ('foodgram.urls_asgi' if SERVER_MODE == 'asgi'
+                else 'foodgram.urls')
 
 TEMPLATES = [
     {
@@ -64,14 +80,62 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
-DATABASES = {
+if os.getenv('SQLITE', 'False') == 'True':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+    if os.getenv('SQLITE_REPLICA', 'False') == 'True':
+        DATABASES['replica_0'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db_replica.sqlite3',
+            'TEST': {'MIRROR': 'default'},
+        }
+    SILENCED_SYSTEM_CHECKS = ['models.W040']
+else:
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'foodgram.db.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'django'),
+            'USER': os.getenv('POSTGRES_USER', 'django'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'db'),
+            'PORT': os.getenv('DB_PORT', 5432),
+            # С пулом соединение возвращается в пул в конце каждого запроса.
+            'CONN_MAX_AGE': (
+                0 if DB_POOL_SIZE
+                else int(os.getenv('DB_CONN_MAX_AGE', 60))),
+            'CONN_HEALTH_CHECKS': (
+                os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'),
+            'POOL_SIZE': DB_POOL_SIZE,
+            'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'POOL_WAIT_WARNING': float(
+                os.getenv('DB_POOL_WAIT_WARNING', 0.1)),
+        }
+    }
+    for index, host in enumerate(os.getenv('DB_REPLICA_HOSTS', '').split()):
+        DATABASES[f'replica_{index}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+REPLICA_PATHS = ('/api/',)
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+ESTIMATED_COUNT_THRESHOLD = 10000
+PAGINATION_COUNT_CACHE_TTL = 30
+RECIPE_CACHE_TTL = 300
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('POSTGRES_DB', 'django'),
-        'USER': os.getenv('POSTGRES_USER', 'django'),
-        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
-        'HOST': os.getenv('DB_HOST', 'db'),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -123,13 +187,49 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPageNumberPagination',
     'PAGE_SIZE': 6,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'shopping_cart': os.getenv('THROTTLE_SHOPPING_CART', '10/min'),
+        'recipe_search': os.getenv('THROTTLE_RECIPE_SEARCH', '60/min'),
+        'registration': os.getenv('THROTTLE_REGISTRATION', '5/hour'),
+    },
+    # nginx передаёт адрес клиента в X-Forwarded-For.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
 }
 
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_LOCAL_TTL = 10
+AUTH_TOKEN_SHARED_TTL = 300
+
+JWT_AUTH_ENABLED = os.getenv('JWT_AUTH_ENABLED', 'False') == 'True'
+JWT_REVOCATION_REFRESH = int(os.getenv('JWT_REVOCATION_REFRESH', 5))
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_MINUTES', 5))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('JWT_REFRESH_DAYS', 7))),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'SIGNING_KEY': os.getenv('JWT_SIGNING_KEY', SECRET_KEY),
+}
+if JWT_AUTH_ENABLED:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = (
+        'api.jwt_auth.StatelessJWTAuthentication',
+        *REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'],
+    )
+
 STATIC_URL = '/static/'
 STATIC_ROOT = '/app/backend_static/'
 
@@ -138,3 +238,16 @@ MEDIA_ROOT = '/app/media/'
 
 RECIPES_ROOT = 'recipes/images/'
 AVATAR_PATH = 'users/'
+
+SHORT_LINK_HOST = os.getenv('SHORT_LINK_HOST', 'foodgram-warqone.zapto.org')
+SHORT_LINK_CACHE_SIZE = 10000
+SHORT_LINK_CACHE_TTL = 60
+SHORT_LINK_FLUSH_INTERVAL = 10
+SHORT_LINK_FLUSH_SIZE = 1000
+
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', 'False') == 'True'
+JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', 2))
+JOB_POLL_INTERVAL = 1
+JOB_LEASE_SECONDS = 600
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
@@ -0,0 +1,165 @@
+import asyncio
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import (AsyncClient, Client, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authtoken.models import Token
+from rest_framework.views import APIView
+
+from foodgram.checks import check_replica_pin_cache
+from foodgram.db_router import use_replica
+from users.models import User
+
+DELAY = 0.3
+
+
+async def slow_view(request):
+    await asyncio.sleep(DELAY)
+    return HttpResponse(str(use_replica.get()))
+
+
+@csrf_exempt
+def routing_view(request):
+    return HttpResponse(str(use_replica.get()))
+
+
+class RoutingAPIView(APIView):
+    """Отвечает, читает ли запрос с реплики после аутентификации."""
+
+    def get(self, request):
+        return HttpResponse(str(use_replica.get()))
+
+    def post(self, request):
+        return HttpResponse(str(use_replica.get()))
+
+
+urlpatterns = [
+    path('api/slow/', slow_view),
+    path('api/routing/', routing_view),
+    path('api/drf-routing/', RoutingAPIView.as_view()),
+]
+
+
+class SharedCacheMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        shared_cache = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.cache_dir.name,
+        }})
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+
+
+@override_settings(ROOT_URLCONF=__name__,
+                   MIDDLEWARE=settings.API_MIDDLEWARE
+                   or settings.MIDDLEWARE,
+                   DATABASE_REPLICAS=['default'])
+class ReplicaRoutingMiddlewareAsyncTest(SimpleTestCase):
+    """ReplicaRoutingMiddleware в ASGI-режиме."""
+
+    async def test_concurrent_requests_are_not_serialized(self):
+        client = AsyncClient()
+        started = time.monotonic()
+        responses = await asyncio.gather(
+            *(client.get('/api/slow/') for _ in range(3)))
+        elapsed = time.monotonic() - started
+        self.assertEqual([response.status_code for response in responses],
+                         [200, 200, 200])
+        self.assertLess(elapsed, DELAY * 2)
+
+    async def test_read_is_routed_to_replica(self):
+        response = await AsyncClient().get('/api/slow/')
+        self.assertEqual(response.content, b'True')
+
+
+@override_settings(ROOT_URLCONF=__name__, DATABASE_REPLICAS=['default'])
+class ReplicaPinTest(SharedCacheMixin, SimpleTestCase):
+    """Клиент после записи читает из основной базы."""
+
+    def test_read_after_write_uses_primary(self):
+        writer = Client(HTTP_AUTHORIZATION='Token writer')
+        other = Client(HTTP_AUTHORIZATION='Token other')
+        self.assertEqual(writer.get('/api/routing/').content, b'True')
+        writer.post('/api/routing/')
+        self.assertEqual(writer.get('/api/routing/').content, b'False')
+        self.assertEqual(other.get('/api/routing/').content, b'True')
+
+    def test_check_passes_with_shared_cache(self):
+        self.assertEqual(check_replica_pin_cache(None), [])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_check_fails_with_process_local_cache(self):
+        errors = check_replica_pin_cache(None)
+        self.assertEqual([error.id for error in errors], ['foodgram.E001'])
+
+
+@override_settings(ROOT_URLCONF=__name__, DATABASE_REPLICAS=['default'])
+class UserReplicaPinTest(SharedCacheMixin, TestCase):
+    """Закрепление по пользователю, новому токену и IP клиента."""
+
+    URL = '/api/drf-routing/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.writer = User.objects.create_user(
+            username='writer', email='writer@example.com', password='pass')
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass')
+
+    def client_for(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        return Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_write_pins_user(self):
+        writer = self.client_for(self.writer)
+        reader = self.client_for(self.reader)
+        # Токены уже доехали до реплик.
+        cache.clear()
+        self.assertEqual(writer.get(self.URL).content, b'True')
+        writer.post(self.URL)
+        self.assertEqual(writer.get(self.URL).content, b'False')
+        self.assertEqual(reader.get(self.URL).content, b'True')
+        self.assertEqual(Client().get(self.URL).content, b'True')
+
+    def test_new_token_is_pinned(self):
+        new = self.client_for(self.writer)
+        self.assertEqual(new.get(self.URL).content, b'False')
+        cache.clear()
+        self.assertEqual(new.get(self.URL).content, b'True')
+
+    def test_anonymous_clients_behind_proxy(self):
+        proxy = {'REMOTE_ADDR': '10.0.0.1'}
+        writer = Client(HTTP_X_FORWARDED_FOR='203.0.113.1', **proxy)
+        other = Client(HTTP_X_FORWARDED_FOR='203.0.113.2', **proxy)
+        writer.post(self.URL)
+        self.assertEqual(writer.get(self.URL).content, b'False')
+        self.assertEqual(other.get(self.URL).content, b'True')
+
+
+# Алиаса нет в DATABASES: любое чтение, ушедшее на «реплику», упадёт.
+@override_settings(DATABASE_REPLICAS=['replica_lagging'])
+class LoginReplicaPinTest(SharedCacheMixin, TestCase):
+    """Первый запрос с новым токеном ищет его в основной базе."""
+
+    def test_first_request_after_login(self):
+        User.objects.create_user(
+            username='user', email='user@example.com', password='pass')
+        response = self.client.post(
+            '/api/auth/token/login/',
+            {'email': 'user@example.com', 'password': 'pass'})
+        self.assertEqual(response.status_code, 200)
+        key = response.json()['auth_token']
+        response = Client(HTTP_AUTHORIZATION=f'Token {key}').get(
+            '/api/users/me/')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,19 @@
+"""URL-конфигурация ASGI-режима.
+
+Списки рецептов, выгрузка списка покупок и короткие ссылки обслуживаются
+асинхронными представлениями, остальные маршруты ― как в foodgram.urls.
+"""
+
+from django.urls import path
+
+from api import async_views
+from foodgram.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('r/<str:short_id>/', async_views.redirect_to_recipe,
+         name='short_url'),
+    path('api/recipes/', async_views.recipe_list, name='recipe-list'),
+    path('api/recipes/download_shopping_cart/',
+         async_views.download_shopping_cart,
+         name='recipe-download-shopping-cart'),
+] + sync_urlpatterns
@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from jobs import constants
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Администраторское меню для очереди задач.
+
+    Упавшие задачи можно поставить в очередь заново.
+    """
+
+    list_display = ('task', 'status', 'attempts', 'run_at', 'created')
+    list_filter = ('status', 'task')
+    readonly_fields = ('created',)
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        queryset.update(
+            status=constants.QUEUED, attempts=0, run_at=timezone.now())
@@ -0,0 +1,11 @@
+TASK_NAME_LENGTH = 255
+STATUS_LENGTH = 10
+QUEUED = 'queued'
+RUNNING = 'running'
+FAILED = 'failed'
+LEASE_EXPIRED = 'Срок аренды последней попытки истёк.'
+STATUS_CHOICES = (
+    (QUEUED, 'В очереди'),
+    (RUNNING, 'Выполняется'),
+    (FAILED, 'Ошибка'),
+)
@@ -0,0 +1,64 @@
+import logging
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+
+from jobs.queue import claim_job, run_job
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=settings.JOB_WORKER_CONCURRENCY,
+            help='Число потоков, выполняющих задачи.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        threads = [
+            threading.Thread(target=self.work, args=(options['once'],),
+                             name=f'foodgram-worker-{number}')
+            for number in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def stop(self, signum, frame):
+        """Завершает работу после текущих задач."""
+        self.stopping.set()
+
+    def work(self, once):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                try:
+                    job = claim_job()
+                    if job is not None:
+                        run_job(job)
+                except DatabaseError:
+                    # База недоступна или занята: поток не должен умирать,
+                    # незавершённую задачу заберут после окончания аренды.
+                    logger.exception('Ошибка базы данных в воркере')
+                    connection.close()
+                    self.stopping.wait(settings.JOB_POLL_INTERVAL)
+                    continue
+                if job is None:
+                    if once:
+                        return
+                    self.stopping.wait(settings.JOB_POLL_INTERVAL)
+        finally:
+            connection.close()
@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+from jobs import constants
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди.
+
+    Задача ― импортируемая функция и её аргументы в JSON. Выполненные
+    задачи удаляются, упавшие после всех попыток остаются со статусом
+    failed и текстом последней ошибки. Пока задача выполняется, run_at
+    хранит срок аренды: после него задачу может забрать другой воркер.
+    """
+
+    task = models.CharField(
+        'Задача',
+        max_length=constants.TASK_NAME_LENGTH,
+    )
+    args = models.JSONField('Аргументы', default=list)
+    status = models.CharField(
+        'Статус',
+        max_length=constants.STATUS_LENGTH,
+        choices=constants.STATUS_CHOICES,
+        default=constants.QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('run_at',)
+        indexes = (
+            models.Index(fields=('status', 'run_at'),
+                         name='job_status_run_at_idx'),
+        )
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return f'{self.task}{tuple(self.args)}'
@@ -0,0 +1,93 @@
+"""Очередь фоновых задач в базе данных.
+
+Задача записывается в таблицу в той же транзакции, что и изменения,
+которые её породили, поэтому воркер видит её только после фиксации и не
+теряет при перезапуске. Воркеры (python manage.py run_worker) забирают
+задачи через SELECT ... FOR UPDATE SKIP LOCKED и не ждут друг друга.
+Упавшая задача повторяется с экспоненциальной задержкой.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs import constants
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(func, *args, delay=0, unique=False):
+    """Ставит func(*args) в очередь.
+
+    func должна быть функцией уровня модуля, args ― значениями JSON.
+    С unique задача не добавляется, если такая же ещё ждёт в очереди:
+    вместе с delay это склеивает серию изменений в один пересчёт.
+    При BACKGROUND_TASKS_EAGER задача выполняется сразу после фиксации
+    текущей транзакции.
+    """
+    if settings.BACKGROUND_TASKS_EAGER:
+        transaction.on_commit(lambda: func(*args))
+        return None
+    task = f'{func.__module__}.{func.__qualname__}'
+    if unique:
+        job = Job.objects.filter(
+            task=task, args=list(args), status=constants.QUEUED).first()
+        if job is not None:
+            return job
+    return Job.objects.create(
+        task=task,
+        args=list(args),
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim_job():
+    """Забирает готовую к выполнению задачу или возвращает None.
+
+    Вместе с задачами в очереди забираются задачи, чей воркер не
+    уложился в JOB_LEASE_SECONDS (например, был остановлен). Такие
+    задачи, исчерпавшие попытки, помечаются failed и больше не берутся.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        Job.objects.filter(
+            status=constants.RUNNING, run_at__lte=now,
+            attempts__gte=F('max_attempts'),
+        ).update(status=constants.FAILED, last_error=constants.LEASE_EXPIRED)
+        job = (Job.objects.select_for_update(skip_locked=True)
+               .filter(status__in=(constants.QUEUED, constants.RUNNING),
+                       run_at__lte=now, attempts__lt=F('max_attempts'))
+               .order_by('run_at').first())
+        if job is None:
+            return None
+        job.status = constants.RUNNING
+        job.attempts += 1
+        job.run_at = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        job.save(update_fields=('status', 'attempts', 'run_at'))
+    return job
+
+
+def run_job(job):
+    """Выполняет задачу: удаляет её или планирует повтор."""
+    try:
+        import_string(job.task)(*job.args)
+    except Exception:
+        logger.exception('Ошибка фоновой задачи %s', job)
+        if job.attempts >= job.max_attempts:
+            status, run_at = constants.FAILED, timezone.now()
+        else:
+            status = constants.QUEUED
+            run_at = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        Job.objects.filter(pk=job.pk).update(
+            status=status, run_at=run_at, last_error=traceback.format_exc())
+    else:
+        Job.objects.filter(pk=job.pk).delete()
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from jobs import constants
+from jobs.models import Job
+from jobs.queue import claim_job
+
+
+class ClaimJobTest(TestCase):
+    """Задачи с истёкшей арендой забираются, пока есть попытки."""
+
+    def create_job(self, attempts):
+        return Job.objects.create(
+            task='recipes.similarity.rebuild_similar',
+            status=constants.RUNNING,
+            attempts=attempts,
+            max_attempts=3,
+            run_at=timezone.now() - timedelta(seconds=1),
+        )
+
+    def test_expired_lease_is_reclaimed(self):
+        job = self.create_job(attempts=1)
+        claimed = claim_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.attempts, 2)
+
+    def test_exhausted_job_is_failed_not_reclaimed(self):
+        job = self.create_job(attempts=3)
+        self.assertIsNone(claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, constants.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(job.last_error, constants.LEASE_EXPIRED)
@@ -1,29 +1,40 @@
 from django.contrib import admin
-from django.db.models import Count
 
-from recipes.models import Ingredient, Recipe, Tag
+from foodgram.db.counts import EstimatedCountPaginator
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, ShortLink,
+                            Tag)
+
+
+class RecipeIngredientInline(admin.TabularInline):
+    """Ингредиенты рецепта с количеством.
+
+    Ингредиент выбирается через автодополнение, поэтому форма не
+    выводит весь справочник ингредиентов.
+    """
+
+    model = RecipeIngredient
+    autocomplete_fields = ('ingredient',)
+    extra = 1
+    min_num = 1
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    """Администраторское меню для модели Recipe."""
+    """Администраторское меню для модели Recipe.
+
+    Список не считает строки точно и не подгружает связанные объекты:
+    число добавлений в избранное хранится в самом рецепте, а поиск по
+    названию обслуживается триграммным индексом.
+    """
 
+    inlines = (RecipeIngredientInline,)
+    raw_id_fields = ('author',)
     list_display = ('name', 'author', 'pub_date', 'favorites_count')
     list_filter = ('tags',)
-    search_fields = ('name', 'author__username')
-
-    def get_queryset(self, request):
-        """Возвращает queryset с дополнительными атрибутами."""
-        queryset = super().get_queryset(request)
-        return queryset.select_related(
-            'author').prefetch_related(
-            'tags', 'ingredients', 'favorites').annotate(
-                favorites_count_cached=Count('favorites'))
-
-    @admin.display(description='Добавлений в избранное')
-    def favorites_count(self, obj):
-        """Возвращает количество добавлений в избранное."""
-        return obj.favorites_count_cached
+    list_select_related = ('author',)
+    search_fields = ('name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     @admin.display(description='Короткая ссылка')
     def short_url(self, obj):
@@ -47,8 +58,20 @@ class TagAdmin(admin.ModelAdmin):
 class IngredientAdmin(admin.ModelAdmin):
     """Админка для модели Ingredient.
 
-    Позволяет просматривать, фильтровать и поиск ингредиентов.
+    Позволяет просматривать, фильтровать и поиск ингредиентов. Поиск
+    используется автодополнением в рецептах и обслуживается триграммным
+    индексом по названию.
     """
 
     list_display = ('name', 'measurement_unit')
     search_fields = ('name',)
+
+
+@admin.register(ShortLink)
+class ShortLinkAdmin(admin.ModelAdmin):
+    """Админка для коротких ссылок со счётчиком переходов."""
+
+    list_display = ('slug', 'recipe', 'clicks')
+    search_fields = ('slug',)
+    raw_id_fields = ('recipe',)
+    readonly_fields = ('slug', 'clicks')
@@ -1,3 +1,25 @@
 MAX_TITLE_LENGTH = 200
 RECIPE_MAX_LENGTH = 1000
 MIN_LENGTH_SHORT_URL = 6
+MAX_TAGS = 63
+TAG_BITS_REFRESH = 5
+FEED_FANOUT_MAX_SUBSCRIBERS = 5000
+FEED_BACKFILL_SIZE = 50
+FEED_BATCH_SIZE = 1000
+TRENDING_HALF_LIFE_HOURS = 48
+TRENDING_WINDOW_DAYS = 30
+FAVORITE_TREND_WEIGHT = 1.0
+SHOPPING_CART_TREND_WEIGHT = 1.0
+SIMILAR_RECIPES_LIMIT = 10
+SIMILAR_MAX_INGREDIENT_SHARE = 0.2
+SIMILAR_MIN_COMMON_RECIPES = 50
+SIMILAR_REFRESH_DELAY = 60
+INGREDIENT_INDEX_REFRESH = 5
+INGREDIENT_INDEX_MAX_AGE = 60
+COOKING_TIME_BUCKETS = ((0, 15), (15, 30), (30, 60), (60, None))
+FACET_AUTHORS_LIMIT = 10
+MAX_SHORT_LINK_LENGTH = 16
+EXPORT_CHUNK_SIZE = 200
+IMPORT_CHUNK_SIZE = 500
+CATALOG_CHUNK_SIZE = 2000
+RECIPE_COUNTER_FIELDS = ('tags_mask', 'favorites_count')
@@ -0,0 +1,59 @@
+"""Счётчики рецептов по тегам, времени приготовления и авторам.
+
+Счётчики по тегам и интервалам времени считаются одним агрегирующим
+запросом по маске тегов, топ авторов ― одним запросом с группировкой.
+"""
+
+from django.db.models import Count, F, Q, Sum
+
+from recipes import constants
+from recipes.tag_mask import get_tag_bits
+
+
+def _bucket_label(low, high):
+    return f'{low}+' if high is None else f'{low}-{high}'
+
+
+def get_facets(queryset):
+    """Возвращает счётчики для отфильтрованного queryset рецептов.
+
+    Аннотации флагов пользователя и prefetch из queryset списка
+    счётчикам не нужны: values() убирает их из запроса, иначе каждая
+    строка считала бы лишние EXISTS.
+    """
+    queryset = queryset.order_by().values(
+        'pk', 'tags_mask', 'cooking_time', 'author')
+    tag_bits = get_tag_bits()
+    aggregates = {
+        f'tag_{bit}': Sum(F('tags_mask').bitrightshift(bit).bitand(1))
+        for bit in tag_bits.values()
+    }
+    for index, (low, high) in enumerate(constants.COOKING_TIME_BUCKETS):
+        condition = Q(cooking_time__gte=low)
+        if high is not None:
+            condition &= Q(cooking_time__lt=high)
+        aggregates[f'time_{index}'] = Count('pk', filter=condition)
+    totals = queryset.aggregate(**aggregates)
+
+    authors = (queryset
+               .values('author_id', 'author__username')
+               .annotate(count=Count('pk'))
+               .order_by('-count', 'author_id')
+               [:constants.FACET_AUTHORS_LIMIT])
+    return {
+        'tags': {
+            slug: totals[f'tag_{bit}'] or 0
+            for slug, bit in sorted(tag_bits.items())
+        },
+        'cooking_time': {
+            _bucket_label(low, high): totals[f'time_{index}']
+            for index, (low, high)
+            in enumerate(constants.COOKING_TIME_BUCKETS)
+        },
+        'authors': [
+            {'id': row['author_id'],
+             'username': row['author__username'],
+             'count': row['count']}
+            for row in authors
+        ],
+    }
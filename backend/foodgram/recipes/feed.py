@@ -0,0 +1,79 @@
+"""Лента рецептов авторов, на которых подписан пользователь.
+
+Рецепты обычных авторов раскладываются по лентам подписчиков при
+публикации (fan-out on write). Рецепты авторов с очень большим числом
+подписчиков в ленты не копируются и подмешиваются при чтении.
+"""
+
+from django.db.models import Q
+
+from recipes import constants
+from recipes.models import FeedItem, Recipe
+from users.models import Subscription, User
+
+
+def is_pull_author(author_id):
+    """Проверяет, читаются ли рецепты автора без раскладки по лентам."""
+    return User.objects.filter(
+        pk=author_id,
+        subscribers_count__gt=constants.FEED_FANOUT_MAX_SUBSCRIBERS,
+    ).exists()
+
+
+def fan_out_recipe(recipe_id):
+    """Добавляет рецепт в ленты всех подписчиков автора."""
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'author_id', 'pub_date').first()
+    if recipe is None or is_pull_author(recipe.author_id):
+        return
+    subscribers = (Subscription.objects
+                   .filter(author_id=recipe.author_id)
+                   .values_list('user_id', flat=True)
+                   .iterator(chunk_size=constants.FEED_BATCH_SIZE))
+    batch = []
+    for user_id in subscribers:
+        batch.append(FeedItem(
+            user_id=user_id, recipe_id=recipe.id, pub_date=recipe.pub_date))
+        if len(batch) >= constants.FEED_BATCH_SIZE:
+            FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill_timeline(user_id, author_id):
+    """Добавляет в ленту последние рецепты автора после подписки."""
+    if is_pull_author(author_id):
+        return
+    recipes = (Recipe.objects
+               .filter(author_id=author_id)
+               .order_by('-pub_date')
+               .values_list('id', 'pub_date')[:constants.FEED_BACKFILL_SIZE])
+    FeedItem.objects.bulk_create(
+        [FeedItem(user_id=user_id, recipe_id=recipe_id, pub_date=pub_date)
+         for recipe_id, pub_date in recipes],
+        ignore_conflicts=True,
+    )
+
+
+def trim_timeline(user_id, author_id):
+    """Убирает из ленты рецепты автора после отписки."""
+    FeedItem.objects.filter(
+        user_id=user_id, recipe__author_id=author_id).delete()
+
+
+def get_feed_queryset(user, queryset):
+    """Ограничивает queryset рецептов лентой пользователя."""
+    pull_authors = list(
+        Subscription.objects
+        .filter(user=user,
+                author__subscribers_count__gt=(
+                    constants.FEED_FANOUT_MAX_SUBSCRIBERS))
+        .values_list('author_id', flat=True)
+    )
+    if not pull_authors:
+        return queryset.filter(
+            feed_items__user=user).order_by('-feed_items__pub_date')
+    timeline = FeedItem.objects.filter(user=user).values('recipe_id')
+    return queryset.filter(
+        Q(pk__in=timeline) | Q(author_id__in=pull_authors)
+    ).order_by('-pub_date')
@@ -0,0 +1,131 @@
+"""Инвертированный индекс ингредиент -> рецепты в памяти процесса.
+
+Используется для поиска рецептов по имеющимся ингредиентам: рецепты
+ранжируются по доле своих ингредиентов, которые есть у пользователя.
+Списки рецептов хранятся отсортированными массивами, пересечения
+считаются одним проходом Counter по массивам запрошенных ингредиентов.
+
+Процесс, изменивший рецепт, обновляет индекс на месте и увеличивает
+версию в общем кеше. Остальные процессы перестраивают индекс, увидев
+новую версию, но не чаще раза в INGREDIENT_INDEX_REFRESH секунд. С
+кешем процесса версию видит только он сам, поэтому индекс дополнительно
+перестраивается, если он старше INGREDIENT_INDEX_MAX_AGE секунд.
+"""
+
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from itertools import chain
+
+from django.core.cache import cache
+
+from foodgram.caches import is_shared_cache
+from recipes import constants
+from recipes.models import RecipeIngredient
+
+VERSION_KEY = 'ingredient_index:version'
+
+
+class IngredientIndex:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._recipes = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._built_at = 0.0
+
+    def _build(self, version):
+        postings = defaultdict(lambda: array('q'))
+        recipes = defaultdict(list)
+        rows = (RecipeIngredient.objects
+                .order_by('ingredient_id', 'recipe_id')
+                .values_list('ingredient_id', 'recipe_id')
+                .iterator(chunk_size=5000))
+        for ingredient_id, recipe_id in rows:
+            postings[ingredient_id].append(recipe_id)
+            recipes[recipe_id].append(ingredient_id)
+        self._postings = dict(postings)
+        self._recipes = {pk: tuple(ids) for pk, ids in recipes.items()}
+        self._version = version
+        self._built_at = time.monotonic()
+
+    def _is_expired(self, now):
+        return (not is_shared_cache()
+                and now - self._built_at
+                >= constants.INGREDIENT_INDEX_MAX_AGE)
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if (self._version is not None
+                and now - self._checked_at
+                < constants.INGREDIENT_INDEX_REFRESH):
+            return
+        with self._lock:
+            self._checked_at = now
+            version = cache.get_or_set(VERSION_KEY, 0, timeout=None)
+            if version != self._version or self._is_expired(now):
+                self._build(version)
+
+    def search(self, ingredient_ids):
+        """Возвращает id рецептов, отсортированные по покрытию.
+
+        Первыми идут рецепты с наибольшей долей имеющихся ингредиентов,
+        при равенстве ― с большим числом совпадений и более новые.
+        """
+        self._ensure_fresh()
+        postings, recipes = self._postings, self._recipes
+        matches = Counter(chain.from_iterable(
+            postings.get(pk, ()) for pk in set(ingredient_ids)))
+        return sorted(
+            matches,
+            key=lambda pk: (-matches[pk] / len(recipes[pk]),
+                            -matches[pk], -pk),
+        )
+
+    def _remove(self, recipe_id):
+        for ingredient_id in self._recipes.pop(recipe_id, ()):
+            posting = self._postings[ingredient_id]
+            del posting[bisect_left(posting, recipe_id)]
+
+    def update_recipe(self, recipe_id):
+        """Обновляет ингредиенты рецепта в индексе."""
+        self.update_recipes([recipe_id])
+
+    def update_recipes(self, recipe_ids):
+        """Обновляет ингредиенты нескольких рецептов одним запросом."""
+        ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+        for recipe_id, ingredient_id in (
+                RecipeIngredient.objects
+                .filter(recipe_id__in=recipe_ids)
+                .values_list('recipe_id', 'ingredient_id')):
+            ingredients[recipe_id].append(ingredient_id)
+        with self._lock:
+            for recipe_id, ingredient_ids in ingredients.items():
+                self._remove(recipe_id)
+                for ingredient_id in ingredient_ids:
+                    insort(self._postings.setdefault(
+                        ingredient_id, array('q')), recipe_id)
+                if ingredient_ids:
+                    self._recipes[recipe_id] = tuple(ingredient_ids)
+            self._bump_version()
+
+    def remove_recipe(self, recipe_id):
+        """Удаляет рецепт из индекса."""
+        with self._lock:
+            self._remove(recipe_id)
+            self._bump_version()
+
+    def _bump_version(self):
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.incr(VERSION_KEY)
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+        else:
+            self._version = None
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import rebuild_similar
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает похожие рецепты по составу ингредиентов.'
+
+    def handle(self, *args, **options):
+        total = rebuild_similar()
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рецепты пересчитаны для {total} рецептов.'))
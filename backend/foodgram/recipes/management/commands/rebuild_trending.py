@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.trending import rebuild_scores
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг популярных рецептов.'
+
+    def handle(self, *args, **options):
+        total = rebuild_scores()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {total} рецептов.'))
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+from hashids import Hashids
+
+MIN_LENGTH_SHORT_URL = 6
+
+
+def fill_short_links(apps, schema_editor):
+    ShortLink = apps.get_model('recipes', 'ShortLink')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    hashids = Hashids(min_length=MIN_LENGTH_SHORT_URL, salt='recipe')
+    ShortLink.objects.bulk_create(
+        [ShortLink(recipe_id=recipe_id, slug=hashids.encode(recipe_id))
+         for recipe_id in Recipe.objects.values_list('id', flat=True)],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_recipe_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortLink',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='short_link', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('slug', models.CharField(max_length=16, unique=True, verbose_name='Слаг')),
+                ('clicks', models.PositiveBigIntegerField(default=0, verbose_name='Переходов')),
+            ],
+            options={
+                'verbose_name': 'Короткая ссылка',
+                'verbose_name_plural': 'Короткие ссылки',
+            },
+        ),
+        migrations.RunPython(fill_short_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:01
+
+from django.db import migrations, models
+
+
+def fill_favorites_count(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    counts = (Favorite.objects
+              .values_list('recipe_id')
+              .annotate(total=models.Count('id'))
+              .order_by())
+    for recipe_id, total in counts:
+        Recipe.objects.filter(pk=recipe_id).update(favorites_count=total)
+
+
+def create_name_trigram_index(apps, schema_editor):
+    # Поиск в админке идёт через UPPER(name) LIKE '%...%'; ускорить его
+    # может только триграммный индекс, который есть лишь в PostgreSQL.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS recipe_name_trgm_idx '
+        'ON recipes_recipe USING gin (UPPER(name::text) gin_trgm_ops)')
+
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS recipe_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_recipe_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлений в избранное'),
+        ),
+        migrations.RunPython(fill_favorites_count, migrations.RunPython.noop),
+        migrations.RunPython(create_name_trigram_index,
+                             drop_name_trigram_index),
+    ]
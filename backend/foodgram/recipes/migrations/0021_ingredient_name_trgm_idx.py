@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def create_name_trigram_index(apps, schema_editor):
+    # Автодополнение ингредиентов в админке ищет через
+    # UPPER(name) LIKE '%...%', как и поиск рецептов (см. 0020).
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx '
+        'ON recipes_ingredient USING gin (UPPER(name::text) gin_trgm_ops)')
+
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS ingredient_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0020_recipe_favorites_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_trigram_index,
+                             drop_name_trigram_index),
+    ]
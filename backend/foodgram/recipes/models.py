@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models
 from django.core.validators import MinValueValidator
 from hashids import Hashids
 
@@ -21,6 +22,11 @@ class Tag(models.Model):
         unique=True,
         verbose_name='Слаг'
     )
+    bit = models.PositiveSmallIntegerField(
+        unique=True,
+        editable=False,
+        verbose_name='Бит в маске тегов рецепта'
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -29,6 +35,23 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        super().clean()
+        if self.bit is None and Tag.objects.count() >= constants.MAX_TAGS:
+            raise ValidationError(
+                f'Нельзя создать больше {constants.MAX_TAGS} тегов.')
+
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            used = set(Tag.objects.values_list('bit', flat=True))
+            self.bit = next(
+                (bit for bit in range(constants.MAX_TAGS) if bit not in used),
+                None)
+            if self.bit is None:
+                raise IntegrityError(
+                    f'Нет свободного бита для тега: их {constants.MAX_TAGS}.')
+        super().save(*args, **kwargs)
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -92,18 +115,52 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации рецепта'
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Дата изменения рецепта'
+    )
+    tags_mask = models.BigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Маска тегов'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Добавлений в избранное'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['-pub_date'], name='recipe_pub_date_idx')
+        ]
 
     def __str__(self):
         return f'Рецепт от {self.author.username}: {self.name}'
 
+    def save(self, *args, **kwargs):
+        """Сохраняет рецепт, не затирая счётчики.
+
+        tags_mask и favorites_count меняются только атомарными UPDATE из
+        сигналов, поэтому при изменении рецепта они не записываются:
+        иначе save() вернул бы в базу значения, прочитанные до
+        параллельного изменения.
+        """
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in constants.RECIPE_COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def get_short_url(self):
-        hashid = hashids.encode(self.id)
-        return f'foodgram-warqone.zapto.org/r/{hashid}'
+        return ShortLink.build_url(self.id)
 
 
 class BaseUserRecipe(models.Model):
@@ -130,6 +187,13 @@ class BaseUserRecipe(models.Model):
                 name='unique_%(class)s'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created'],
+                include=['recipe'],
+                name='%(class)s_user_created_idx'
+            )
+        ]
 
 
 class RecipeIngredient(models.Model):
@@ -183,3 +247,148 @@ class ShoppingCart(BaseUserRecipe):
 
     def __str__(self):
         return f'{self.user.username} добавил {self.recipe.name} в корзину'
+
+
+class FeedItem(models.Model):
+    """Запись в ленте подписчика.
+
+    Заполняется при публикации рецепта (fan-out on write), чтобы лента
+    читалась одним проходом по индексу (user, -pub_date).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации рецепта')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_item'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'],
+                name='feed_user_pub_date_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class TrendingScore(models.Model):
+    """Рейтинг популярности рецепта с затуханием по времени.
+
+    Хранится логарифм суммы весов добавлений в избранное и корзину,
+    поэтому сравнение рейтингов не зависит от момента чтения.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Рецепт'
+    )
+    score = models.FloatField(verbose_name='Рейтинг', db_index=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.score:.3f}'
+
+
+class SimilarRecipe(models.Model):
+    """Предрассчитанный похожий рецепт по составу ингредиентов."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_for',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} ~ {self.similar_id}: {self.score:.2f}'
+
+
+class ShortLink(models.Model):
+    """Короткая ссылка на рецепт.
+
+    Слаг вычисляется из id рецепта, поэтому ссылку можно выдать без
+    обращения к базе, а сохранённый слаг нужен для проверки при переходе
+    и для счётчика переходов.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='short_link',
+        verbose_name='Рецепт'
+    )
+    slug = models.CharField(
+        max_length=constants.MAX_SHORT_LINK_LENGTH,
+        unique=True,
+        verbose_name='Слаг'
+    )
+    clicks = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Переходов'
+    )
+
+    class Meta:
+        verbose_name = 'Короткая ссылка'
+        verbose_name_plural = 'Короткие ссылки'
+
+    def __str__(self):
+        return self.slug
+
+    @staticmethod
+    def make_slug(recipe_id):
+        return hashids.encode(recipe_id)
+
+    @classmethod
+    def build_url(cls, recipe_id):
+        return f'{settings.SHORT_LINK_HOST}/r/{cls.make_slug(recipe_id)}'
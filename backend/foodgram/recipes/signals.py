@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+from recipes import constants, feed, similarity, tag_mask, trending
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Favorite, Recipe, ShoppingCart, ShortLink, Tag
+from users.models import Subscription
+
+
+@receiver(post_save, sender=Recipe)
+def create_short_link(sender, instance, created, **kwargs):
+    """Сохраняет короткую ссылку нового рецепта."""
+    if created:
+        ShortLink.objects.create(
+            recipe=instance, slug=ShortLink.make_slug(instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    """Раскладывает новый рецепт по лентам подписчиков."""
+    if created:
+        enqueue(feed.fan_out_recipe, instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_similar_recipes(sender, instance, **kwargs):
+    """Ставит в очередь пересчёт похожих рецептов после изменения."""
+    enqueue(similarity.refresh_recipe, instance.pk,
+            delay=constants.SIMILAR_REFRESH_DELAY, unique=True)
+
+
+@receiver(post_save, sender=Recipe)
+def update_ingredient_index(sender, instance, **kwargs):
+    """Обновляет индекс ингредиентов после записи рецепта."""
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: ingredient_index.update_recipe(recipe_id))
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_ingredient_index(sender, instance, **kwargs):
+    """Убирает удалённый рецепт из индекса ингредиентов."""
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: ingredient_index.remove_recipe(recipe_id))
+
+
+@receiver(post_save, sender=Subscription)
+def backfill_timeline(sender, instance, created, **kwargs):
+    """Заполняет ленту рецептами автора после подписки."""
+    if created:
+        enqueue(feed.backfill_timeline, instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def trim_timeline(sender, instance, **kwargs):
+    """Очищает ленту от рецептов автора после отписки."""
+    enqueue(feed.trim_timeline, instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик добавлений рецепта в избранное."""
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F('favorites_count') + 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(sender, instance, **kwargs):
+    """Уменьшает счётчик добавлений рецепта в избранное."""
+    Recipe.objects.filter(
+        pk=instance.recipe_id, favorites_count__gt=0
+    ).update(favorites_count=F('favorites_count') - 1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def register_trending_event(sender, instance, created, **kwargs):
+    """Учитывает добавление в избранное или корзину в рейтинге."""
+    if created:
+        weight = dict(trending.EVENT_WEIGHTS)[sender]
+        trending.register_event(instance.recipe_id, instance.created, weight)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_tags_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    """Поддерживает маску тегов рецепта при изменении M2M."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        tag_mask.update_recipe_mask(instance.pk)
+    elif action == 'post_add':
+        tag_mask.set_tag_bit(instance.bit, pk_set)
+    else:
+        tag_mask.clear_tag_bit(instance.bit, pk_set)
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_tag_bits(sender, **kwargs):
+    """Сбрасывает кеш битов тегов."""
+    tag_mask.invalidate_tag_bits()
+
+
+@receiver(post_save, sender=Tag)
+def touch_tag_recipes(sender, instance, created, **kwargs):
+    """Отмечает рецепты изменёнными после изменения тега."""
+    if not created:
+        tag_mask.touch_tag_recipes(instance.bit)
+
+
+@receiver(post_delete, sender=Tag)
+def clear_deleted_tag_bit(sender, instance, **kwargs):
+    """Убирает бит удалённого тега из масок рецептов."""
+    tag_mask.clear_tag_bit(instance.bit)
+    tag_mask.invalidate_tag_bits()
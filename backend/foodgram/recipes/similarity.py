@@ -0,0 +1,115 @@
+"""Похожие рецепты по составу ингредиентов.
+
+Рецепты сравниваются по коэффициенту Жаккара между множествами
+ингредиентов. Пересечения считаются через инвертированный индекс
+ингредиент -> рецепты (разреженное произведение матрицы рецептов на
+ингредиенты), а K ближайших соседей каждого рецепта сохраняются в
+SimilarRecipe. Слишком распространённые ингредиенты (соль, вода)
+ничего не говорят о сходстве и не учитываются.
+"""
+
+import heapq
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from recipes import constants
+from recipes.models import RecipeIngredient, SimilarRecipe
+
+
+def _max_frequency(recipes_count):
+    return max(constants.SIMILAR_MIN_COMMON_RECIPES,
+               int(recipes_count * constants.SIMILAR_MAX_INGREDIENT_SHARE))
+
+
+def _top_similar(recipe_id, overlaps, sizes, size):
+    """Выбирает K рецептов с наибольшим коэффициентом Жаккара."""
+    scores = (
+        (common / (size + sizes[other] - common), other)
+        for other, common in overlaps.items()
+        if other != recipe_id
+    )
+    return heapq.nlargest(constants.SIMILAR_RECIPES_LIMIT, scores)
+
+
+def rebuild_similar():
+    """Пересчитывает похожие рецепты для всего каталога."""
+    postings = defaultdict(list)
+    recipes = defaultdict(list)
+    rows = RecipeIngredient.objects.values_list(
+        'recipe_id', 'ingredient_id').iterator(chunk_size=5000)
+    for recipe_id, ingredient_id in rows:
+        postings[ingredient_id].append(recipe_id)
+        recipes[recipe_id].append(ingredient_id)
+
+    max_frequency = _max_frequency(len(recipes))
+    postings = {
+        ingredient_id: recipe_ids
+        for ingredient_id, recipe_ids in postings.items()
+        if len(recipe_ids) <= max_frequency
+    }
+    for recipe_id, ingredient_ids in recipes.items():
+        recipes[recipe_id] = [pk for pk in ingredient_ids if pk in postings]
+    sizes = {recipe_id: len(ids) for recipe_id, ids in recipes.items()}
+
+    similar = []
+    for recipe_id, ingredient_ids in recipes.items():
+        overlaps = Counter()
+        for ingredient_id in ingredient_ids:
+            overlaps.update(postings[ingredient_id])
+        similar.extend(
+            SimilarRecipe(recipe_id=recipe_id, similar_id=other, score=score)
+            for score, other in _top_similar(
+                recipe_id, overlaps, sizes, sizes[recipe_id])
+        )
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        SimilarRecipe.objects.bulk_create(similar, batch_size=1000)
+    return len(recipes)
+
+
+def refresh_recipe(recipe_id):
+    """Пересчитывает похожие рецепты для одного рецепта.
+
+    Читаются только рецепты с общими ингредиентами, списки других
+    рецептов обновляются при полном пересчёте.
+    """
+    own = list(RecipeIngredient.objects
+               .filter(recipe_id=recipe_id)
+               .values_list('ingredient_id', flat=True))
+    recipes_count = (RecipeIngredient.objects
+                     .values('recipe_id').distinct().count())
+    frequent = list(
+        RecipeIngredient.objects
+        .filter(ingredient_id__in=own)
+        .values('ingredient_id')
+        .annotate(recipes=Count('recipe_id'))
+        .filter(recipes__gt=_max_frequency(recipes_count))
+        .values_list('ingredient_id', flat=True)
+    )
+    ingredients = set(own).difference(frequent)
+    overlaps = dict(
+        RecipeIngredient.objects
+        .filter(ingredient_id__in=ingredients)
+        .values_list('recipe_id')
+        .annotate(common=Count('id'))
+        .order_by()
+    )
+    sizes = dict(
+        RecipeIngredient.objects
+        .filter(recipe_id__in=list(overlaps))
+        .exclude(ingredient_id__in=frequent)
+        .values_list('recipe_id')
+        .annotate(size=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(recipe_id=recipe_id).delete()
+        if recipe_id not in sizes:
+            return
+        SimilarRecipe.objects.bulk_create([
+            SimilarRecipe(recipe_id=recipe_id, similar_id=other, score=score)
+            for score, other in _top_similar(
+                recipe_id, overlaps, sizes, sizes[recipe_id])
+        ])
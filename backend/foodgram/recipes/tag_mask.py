@@ -0,0 +1,104 @@
+"""Маска тегов рецепта.
+
+Каждому тегу выдан свой бит (Tag.bit), а в Recipe.tags_mask хранится
+побитовое ИЛИ битов его тегов. Фильтр по тегам сводится к одному
+условию на таблицу рецептов без соединения с M2M-таблицей и DISTINCT.
+Маска меняется через UPDATE, поэтому Recipe.updated (auto_now)
+проставляется явно: иначе изменения тегов не попадут в выгрузки с since.
+Соответствие slug -> бит кешируется в памяти процесса и сбрасывается
+через версию в общем кеше при изменении тегов. С кешем процесса версию
+другого воркера не увидеть, поэтому соответствие перечитывается раз в
+TAG_BITS_REFRESH секунд.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from foodgram.caches import is_shared_cache
+from recipes import constants
+from recipes.models import Recipe, Tag
+
+VERSION_KEY = 'tag_bits:version'
+
+_tag_bits = None
+_version = None
+_checked_at = 0.0
+
+
+def get_tag_bits():
+    """Возвращает словарь slug -> бит."""
+    global _tag_bits, _version, _checked_at
+    now = time.monotonic()
+    if (_tag_bits is not None
+            and now - _checked_at < constants.TAG_BITS_REFRESH):
+        return _tag_bits
+    version = cache.get_or_set(VERSION_KEY, 0, timeout=None)
+    if _tag_bits is None or version != _version or not is_shared_cache():
+        _tag_bits = dict(Tag.objects.values_list('slug', 'bit'))
+        _version = version
+    _checked_at = now
+    return _tag_bits
+
+
+def invalidate_tag_bits():
+    """Сбрасывает кеш битов тегов во всех процессах."""
+    global _tag_bits
+    cache.add(VERSION_KEY, 0, timeout=None)
+    cache.incr(VERSION_KEY)
+    _tag_bits = None
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in sorted(get_tag_bits())]
+
+
+def get_mask(slugs):
+    """Маска для набора slug тегов."""
+    tag_bits = get_tag_bits()
+    mask = 0
+    for slug in slugs:
+        mask |= 1 << tag_bits[slug]
+    return mask
+
+
+def get_slugs(mask):
+    """Slug тегов, входящих в маску."""
+    return [slug for slug, bit in get_tag_bits().items() if mask >> bit & 1]
+
+
+def update_recipe_mask(recipe_id):
+    """Пересчитывает маску тегов рецепта."""
+    mask = 0
+    for bit in Tag.objects.filter(
+            recipes=recipe_id).values_list('bit', flat=True):
+        mask |= 1 << bit
+    Recipe.objects.filter(pk=recipe_id).update(
+        tags_mask=mask, updated=timezone.now())
+
+
+def set_tag_bit(bit, recipe_ids):
+    """Добавляет бит тега в маску рецептов."""
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        tags_mask=F('tags_mask').bitor(1 << bit), updated=timezone.now())
+
+
+def _with_tag_bit(bit):
+    return Recipe.objects.alias(
+        tag_bit=F('tags_mask').bitand(1 << bit)).exclude(tag_bit=0)
+
+
+def clear_tag_bit(bit, recipe_ids=None):
+    """Убирает бит тега из маски рецептов (всех, если не указаны)."""
+    queryset = _with_tag_bit(bit)
+    if recipe_ids is not None:
+        queryset = queryset.filter(pk__in=recipe_ids)
+    queryset.update(tags_mask=F('tags_mask').bitand(~(1 << bit)),
+                    updated=timezone.now())
+
+
+def touch_tag_recipes(bit):
+    """Отмечает изменёнными рецепты с тегом (после переименования)."""
+    _with_tag_bit(bit).update(updated=timezone.now())
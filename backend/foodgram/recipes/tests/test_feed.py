@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes import constants
+from recipes.models import FeedItem, Recipe
+from users.models import Subscription, User
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class FeedTest(TestCase):
+    """Рецепты обычных авторов раскладываются по лентам, популярных ―
+    подмешиваются при чтении."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass')
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def subscribe(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.create(user=self.reader, author=self.author)
+
+    def create_recipe(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=self.author, name='Рецепт', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png')
+
+    def publish(self):
+        self.subscribe()
+        return self.create_recipe()
+
+    def get_feed(self):
+        response = self.client.get('/api/recipes/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_push_author(self):
+        recipe = self.publish()
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, recipe=recipe).exists())
+        self.assertEqual(self.get_feed(), [recipe.pk])
+
+    @mock.patch.object(constants, 'FEED_FANOUT_MAX_SUBSCRIBERS', 0)
+    def test_pull_author(self):
+        recipe = self.publish()
+        self.assertFalse(FeedItem.objects.exists())
+        self.assertEqual(self.get_feed(), [recipe.pk])
+
+    @mock.patch.object(constants, 'FEED_FANOUT_MAX_SUBSCRIBERS', 0)
+    def test_pull_author_after_profile_update(self):
+        stale_author = User.objects.get(pk=self.author.pk)
+        self.subscribe()
+        stale_author.first_name = 'Новое имя'
+        stale_author.save()
+        recipe = self.create_recipe()
+        self.assertFalse(FeedItem.objects.exists())
+        self.assertEqual(self.get_feed(), [recipe.pk])
+
+    def test_unsubscribe_trims_feed(self):
+        self.publish()
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.filter(user=self.reader).delete()
+        self.assertFalse(FeedItem.objects.exists())
+        self.assertEqual(self.get_feed(), [])
@@ -0,0 +1,47 @@
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.test import TestCase
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+
+class RecipeIndexesTest(TestCase):
+    """Планы запросов списков используют индексы из миграции 0017."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='pass')
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/recipe.png')
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # На нескольких строках планировщик выбрал бы полный просмотр.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_recipe_list_uses_pub_date_index(self):
+        plan = self.explain(Recipe.objects.order_by('-pub_date')[:6])
+        self.assertIn('recipe_pub_date_idx', plan)
+
+    def test_user_favorites_use_user_created_index(self):
+        plan = self.explain(Favorite.objects.filter(user=self.user)
+                            .order_by('-created').values('recipe'))
+        self.assertIn('favorite_user_created_idx', plan)
+
+    def test_user_shopping_cart_uses_user_created_index(self):
+        plan = self.explain(ShoppingCart.objects.filter(user=self.user)
+                            .order_by('-created').values('recipe'))
+        self.assertIn('shoppingcart_user_created_idx', plan)
+
+    def test_favorite_semijoin_does_not_scan_favorites(self):
+        plan = self.explain(Recipe.objects.filter(Exists(
+            Favorite.objects.filter(user=self.user, recipe=OuterRef('pk')))))
+        self.assertNotRegex(plan, r'(SCAN|Seq Scan on) (U0|recipes_favorite)')
@@ -0,0 +1,133 @@
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes import constants
+from recipes.ingredient_index import IngredientIndex, ingredient_index
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from users.models import User
+
+
+class IngredientIndexTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+        cls.flour, cls.egg, cls.milk, cls.fish = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('мука', 'яйцо', 'молоко', 'рыба'))
+        cls.pancakes = cls.create_recipe(
+            'Блины', cls.flour, cls.egg, cls.milk)
+        cls.omelette = cls.create_recipe('Омлет', cls.egg, cls.milk)
+        cls.soup = cls.create_recipe('Уха', cls.fish)
+
+    @classmethod
+    def create_recipe(cls, name, *ingredients):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Текст', cooking_time=10,
+            image='recipes/images/recipe.png')
+        for ingredient in ingredients:
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=1)
+        return recipe
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index._version = None
+
+
+class IngredientIndexTest(IngredientIndexTestCase):
+    """Поиск и обновление индекса ингредиентов."""
+
+    def test_search_ranks_by_coverage(self):
+        index = IngredientIndex()
+        self.assertEqual(
+            index.search([self.egg.pk, self.milk.pk]),
+            [self.omelette.pk, self.pancakes.pk])
+        self.assertEqual(index.search([self.fish.pk]), [self.soup.pk])
+
+    def test_update_and_remove_recipe(self):
+        index = IngredientIndex()
+        index.search([self.fish.pk])
+        RecipeIngredient.objects.create(
+            recipe=self.omelette, ingredient=self.fish, amount=1)
+        index.update_recipe(self.omelette.pk)
+        self.assertEqual(
+            index.search([self.fish.pk]), [self.soup.pk, self.omelette.pk])
+        index.remove_recipe(self.soup.pk)
+        self.assertEqual(index.search([self.fish.pk]), [self.omelette.pk])
+
+    @mock.patch.object(constants, 'INGREDIENT_INDEX_REFRESH', 0)
+    def test_other_process_sees_version_bump(self):
+        writer, reader = IngredientIndex(), IngredientIndex()
+        reader.search([self.fish.pk])
+        RecipeIngredient.objects.create(
+            recipe=self.omelette, ingredient=self.fish, amount=1)
+        writer.update_recipe(self.omelette.pk)
+        self.assertIn(self.omelette.pk, reader.search([self.fish.pk]))
+
+
+@mock.patch.object(constants, 'INGREDIENT_INDEX_REFRESH', 0)
+@mock.patch.object(constants, 'INGREDIENT_INDEX_MAX_AGE', 0)
+class IngredientIndexMaxAgeTest(IngredientIndexTestCase):
+    """Без общего кеша индекс перестраивается по возрасту."""
+
+    def change_without_version_bump(self, index):
+        index.search([self.fish.pk])
+        # Так выглядит изменение из другого воркера: версия в его кеше.
+        RecipeIngredient.objects.create(
+            recipe=self.omelette, ingredient=self.fish, amount=1)
+        return index.search([self.fish.pk])
+
+    def test_process_local_cache_rebuilds_by_age(self):
+        self.assertIn(
+            self.omelette.pk, self.change_without_version_bump(
+                IngredientIndex()))
+
+    def test_shared_cache_relies_on_version(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}):
+                self.assertNotIn(
+                    self.omelette.pk, self.change_without_version_bump(
+                        IngredientIndex()))
+
+
+class ByIngredientsTest(IngredientIndexTestCase):
+    """Поиск рецептов по имеющимся ингредиентам через API."""
+
+    def get_ids(self, *ingredients):
+        response = APIClient().get(
+            '/api/recipes/by_ingredients/',
+            {'ingredients': ','.join(str(item.pk) for item in ingredients)})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_ranking(self):
+        self.assertEqual(
+            self.get_ids(self.egg, self.milk),
+            [self.omelette.pk, self.pancakes.pk])
+
+    def test_new_recipe_is_found(self):
+        self.get_ids(self.fish)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = self.create_recipe('Рыба с яйцом', self.fish, self.egg)
+        self.assertEqual(self.get_ids(self.fish), [self.soup.pk, recipe.pk])
+
+    def test_deleted_recipe_is_not_found(self):
+        self.get_ids(self.fish)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soup.delete()
+        self.assertEqual(self.get_ids(self.fish), [])
+
+    def test_requires_ingredients(self):
+        response = APIClient().get(
+            '/api/recipes/by_ingredients/', {'ingredients': 'x'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            Tag)
+from users.models import User
+
+
+def create_recipes(author, count, start=0):
+    ingredient, _ = Ingredient.objects.get_or_create(
+        name='соль', measurement_unit='г')
+    tag, _ = Tag.objects.get_or_create(name='Завтрак', slug='breakfast')
+    for number in range(start, start + count):
+        recipe = Recipe.objects.create(
+            author=author, name=f'Рецепт {number}', text='Текст',
+            cooking_time=10, image='recipes/images/recipe.png')
+        recipe.tags.add(tag)
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=1)
+
+
+class RecipeListQueryCountTest(TestCase):
+    """Число запросов списков не зависит от числа рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        create_recipes(cls.admin, 2)
+
+    def count_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_admin_changelist(self):
+        self.client.force_login(self.admin)
+        url = '/admin/recipes/recipe/'
+        self.count_queries(self.client, url)
+        # Сессия, пользователь, число строк, страница и фильтр по тегам.
+        with self.assertNumQueries(5):
+            self.client.get(url)
+        create_recipes(self.admin, 5, start=2)
+        with self.assertNumQueries(5):
+            self.client.get(url)
+
+    def test_api_list(self):
+        client = APIClient()
+        url = '/api/recipes/?limit=10'
+        # Подсчёт, страница и предвыборки тегов, строк ингредиентов
+        # и самих ингредиентов.
+        with self.assertNumQueries(5):
+            self.count_queries(client, url)
+        create_recipes(self.admin, 5, start=2)
+        with self.assertNumQueries(5):
+            self.count_queries(client, url)
+
+
+class RecipeCountersTest(TestCase):
+    """save() рецепта не затирает счётчики, изменённые параллельно."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+        create_recipes(cls.author, 1)
+        cls.recipe_id = Recipe.objects.get().pk
+
+    def test_save_keeps_favorites_count(self):
+        stale = Recipe.objects.get(pk=self.recipe_id)
+        Favorite.objects.create(user=self.author, recipe_id=self.recipe_id)
+        stale.name = 'Новое название'
+        stale.save()
+        recipe = Recipe.objects.get(pk=self.recipe_id)
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_save_keeps_tags_mask(self):
+        stale = Recipe.objects.get(pk=self.recipe_id)
+        tag = Tag.objects.create(name='Обед', slug='lunch')
+        Recipe.objects.get(pk=self.recipe_id).tags.add(tag)
+        stale.save()
+        recipe = Recipe.objects.get(pk=self.recipe_id)
+        self.assertEqual(recipe.tags_mask, stale.tags_mask | 1 << tag.bit)
@@ -0,0 +1,53 @@
+from django.test import TestCase
+
+from jobs.models import Job
+from recipes import similarity
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            SimilarRecipe)
+from users.models import User
+
+
+class SimilarRecipesTest(TestCase):
+    """Пересчёт похожих рецептов после изменения рецепта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+        cls.flour, cls.egg, cls.fish = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('мука', 'яйцо', 'рыба'))
+        cls.pancakes = cls.create_recipe('Блины', cls.flour, cls.egg)
+        cls.pie = cls.create_recipe('Пирог', cls.flour)
+        cls.soup = cls.create_recipe('Уха', cls.fish)
+
+    @classmethod
+    def create_recipe(cls, name, *ingredients):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Текст', cooking_time=10,
+            image='recipes/images/recipe.png')
+        for ingredient in ingredients:
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=1)
+        return recipe
+
+    def test_saves_are_debounced_into_one_job(self):
+        Job.objects.all().delete()
+        for _ in range(3):
+            self.pancakes.save()
+        self.assertEqual(
+            Job.objects.filter(
+                task='recipes.similarity.refresh_recipe',
+                args=[self.pancakes.pk]).count(),
+            1)
+
+    def test_refresh_recipe_compares_recipes_sharing_ingredients(self):
+        similarity.refresh_recipe(self.pancakes.pk)
+        similar = SimilarRecipe.objects.get(recipe=self.pancakes)
+        self.assertEqual(similar.similar_id, self.pie.pk)
+        self.assertEqual(similar.score, 0.5)
+
+    def test_refresh_recipe_without_ingredients(self):
+        recipe = self.create_recipe('Пусто')
+        similarity.refresh_recipe(recipe.pk)
+        self.assertFalse(SimilarRecipe.objects.filter(recipe=recipe).exists())
@@ -0,0 +1,43 @@
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes import constants, tag_mask
+from recipes.models import Tag
+
+
+@mock.patch.object(constants, 'TAG_BITS_REFRESH', 0)
+class TagBitsRefreshTest(TestCase):
+    """Теги, созданные другим воркером, попадают в фильтр по тегам."""
+
+    def setUp(self):
+        cache.clear()
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+        tag_mask.get_tag_bits()
+
+    def create_tag_elsewhere(self):
+        # bulk_create не отправляет сигналов: версия не меняется, как при
+        # создании тега в другом воркере с кешем процесса.
+        Tag.objects.bulk_create([Tag(name='Обед', slug='lunch', bit=10)])
+
+    def test_process_local_cache_rereads_tags(self):
+        self.create_tag_elsewhere()
+        self.assertEqual(tag_mask.get_tag_bits()['lunch'], 10)
+        response = APIClient().get('/api/recipes/', {'tags': 'lunch'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_shared_cache_relies_on_version(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}):
+                tag_mask.get_tag_bits()
+                self.create_tag_elsewhere()
+                self.assertNotIn('lunch', tag_mask.get_tag_bits())
+                tag_mask.invalidate_tag_bits()
+                self.assertIn('lunch', tag_mask.get_tag_bits())
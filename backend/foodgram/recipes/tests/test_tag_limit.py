@@ -0,0 +1,38 @@
+from django.db import IntegrityError
+from django.test import TestCase
+
+from recipes import constants
+from recipes.models import Tag
+from users.models import User
+
+
+class TagLimitTest(TestCase):
+    """Тегов не больше, чем битов в маске рецепта."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        for number in range(constants.MAX_TAGS):
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag-{number}')
+
+    def test_admin_shows_form_error(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            '/admin/recipes/tag/add/', {'name': 'Лишний', 'slug': 'extra'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, f'Нельзя создать больше {constants.MAX_TAGS} тегов.')
+        self.assertFalse(Tag.objects.filter(slug='extra').exists())
+
+    def test_admin_edits_existing_tag(self):
+        self.client.force_login(self.admin)
+        tag = Tag.objects.get(slug='tag-0')
+        response = self.client.post(
+            f'/admin/recipes/tag/{tag.pk}/change/',
+            {'name': 'Переименован', 'slug': 'tag-0'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_save_raises_integrity_error(self):
+        with self.assertRaises(IntegrityError):
+            Tag.objects.create(name='Лишний', slug='extra')
@@ -0,0 +1,67 @@
+import json
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, Tag
+from users.models import User
+
+
+class TagChangesInCatalogTest(TestCase):
+    """Изменения тегов попадают в выгрузку каталога с since."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.recipe = Recipe.objects.create(
+            author=cls.admin, name='Рецепт', text='Текст', cooking_time=10,
+            image='recipes/images/recipe.png')
+        cls.recipe.tags.add(cls.tag)
+
+    def setUp(self):
+        self.since = timezone.now() - timedelta(hours=1)
+        Recipe.objects.update(updated=self.since - timedelta(days=1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get_catalog(self):
+        response = self.client.get(
+            '/api/recipes/catalog/', {'since': self.since.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_unchanged_recipe_is_not_exported(self):
+        self.assertEqual(self.get_catalog(), [])
+
+    def test_tag_added_to_recipe(self):
+        lunch = Tag.objects.create(name='Обед', slug='lunch')
+        self.recipe.tags.add(lunch)
+        [row] = self.get_catalog()
+        self.assertCountEqual(row['tags'], ['breakfast', 'lunch'])
+
+    def test_recipe_added_to_tag(self):
+        lunch = Tag.objects.create(name='Обед', slug='lunch')
+        lunch.recipes.add(self.recipe)
+        [row] = self.get_catalog()
+        self.assertCountEqual(row['tags'], ['breakfast', 'lunch'])
+
+    def test_tag_removed(self):
+        self.recipe.tags.remove(self.tag)
+        [row] = self.get_catalog()
+        self.assertEqual(row['tags'], [])
+
+    def test_tag_deleted(self):
+        self.tag.delete()
+        [row] = self.get_catalog()
+        self.assertEqual(row['tags'], [])
+
+    def test_tag_renamed(self):
+        self.tag.slug = 'morning'
+        self.tag.save()
+        [row] = self.get_catalog()
+        self.assertEqual(row['tags'], ['morning'])
@@ -0,0 +1,81 @@
+"""Рейтинг популярных рецептов с затуханием по времени.
+
+Каждое добавление в избранное или корзину весит 2 ** ((t - EPOCH) / T),
+где T ― период полураспада. Рейтинг хранится как натуральный логарифм
+суммы весов: он растёт линейно со временем, не переполняется и
+сравнивается одинаково в любой момент, поэтому его можно обновлять
+инкрементально, не пересчитывая остальные рецепты.
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from recipes import constants
+from recipes.models import Favorite, ShoppingCart, TrendingScore
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+EVENT_WEIGHTS = (
+    (Favorite, constants.FAVORITE_TREND_WEIGHT),
+    (ShoppingCart, constants.SHOPPING_CART_TREND_WEIGHT),
+)
+
+
+def event_score(created, weight=1.0):
+    """Логарифм веса одного добавления."""
+    half_lives = ((created - EPOCH).total_seconds()
+                  / (constants.TRENDING_HALF_LIFE_HOURS * 3600))
+    return half_lives * math.log(2) + math.log(weight)
+
+
+def _log_add_exp(a, b):
+    return max(a, b) + math.log1p(math.exp(-abs(a - b)))
+
+
+def register_event(recipe_id, created, weight=1.0):
+    """Учитывает добавление рецепта одним UPDATE."""
+    value = Value(event_score(created, weight))
+    updated = TrendingScore.objects.filter(recipe_id=recipe_id).update(
+        score=Greatest(F('score'), value)
+        + Ln(Value(1.0) + Exp(-Abs(F('score') - value)))
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            TrendingScore.objects.create(
+                recipe_id=recipe_id, score=value.value)
+    except IntegrityError:
+        register_event(recipe_id, created, weight)
+
+
+def rebuild_scores():
+    """Пересчитывает рейтинги по добавлениям за последнее окно.
+
+    Убирает вклад удалённых из избранного и корзины рецептов и
+    добавления старше TRENDING_WINDOW_DAYS.
+    """
+    since = timezone.now() - timedelta(days=constants.TRENDING_WINDOW_DAYS)
+    scores = defaultdict(lambda: -math.inf)
+    for model, weight in EVENT_WEIGHTS:
+        events = (model.objects
+                  .filter(created__gte=since)
+                  .values_list('recipe_id', 'created')
+                  .iterator())
+        for recipe_id, created in events:
+            scores[recipe_id] = _log_add_exp(
+                scores[recipe_id], event_score(created, weight))
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingScore.objects.bulk_create(
+            [TrendingScore(recipe_id=recipe_id, score=score)
+             for recipe_id, score in scores.items()],
+            batch_size=1000,
+        )
+    return len(scores)
@@ -11,3 +11,5 @@ ROLE_CHOICES = (
     (USER, 'Пользователь'),
     (ADMIN, 'Администратор'),
 )
+JTI_LENGTH = 32
+USER_COUNTER_FIELDS = ('subscribers_count',)
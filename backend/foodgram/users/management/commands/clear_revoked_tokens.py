@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = 'Удаляет записи об отозванных JWT с истёкшим сроком.'
+
+    def handle(self, *args, **options):
+        total, _ = RevokedToken.objects.filter(
+            expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено записей: {total}.'))
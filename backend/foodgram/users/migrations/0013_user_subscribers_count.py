@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def fill_subscribers_count(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Subscription = apps.get_model('users', 'Subscription')
+    counts = (Subscription.objects
+              .values_list('author_id')
+              .annotate(total=models.Count('id'))
+              .order_by())
+    for author_id, total in counts:
+        User.objects.filter(pk=author_id).update(subscribers_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_auto_20250524_0246'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.RunPython(fill_subscribers_count, migrations.RunPython.noop),
+    ]
@@ -46,10 +46,32 @@ class User(AbstractUser):
         upload_to=settings.AVATAR_PATH,
         blank=True,
     )
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        """Сохраняет пользователя, не затирая счётчик подписчиков.
+
+        subscribers_count меняется только атомарными UPDATE из сигналов
+        подписок, а пользователь запроса мог быть прочитан до них (в том
+        числе из кеша токенов), поэтому при изменении профиля счётчик не
+        записывается.
+        """
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in constants.USER_COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == constants.ADMIN or self.is_superuser
@@ -87,3 +109,36 @@ class Subscription(models.Model):
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class RevokedToken(models.Model):
+    """Отозванный JWT.
+
+    Запись с jti отзывает один токен, запись без jti ― все токены
+    пользователя, выпущенные до revoked_at (смена пароля, деактивация).
+    После expires_at запись больше не нужна и может быть удалена.
+    """
+
+    jti = models.CharField(
+        'Идентификатор токена',
+        max_length=constants.JTI_LENGTH,
+        blank=True,
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='revoked_tokens',
+        verbose_name='Пользователь'
+    )
+    revoked_at = models.DateTimeField('Отозван', auto_now_add=True)
+    expires_at = models.DateTimeField('Истекает', db_index=True)
+
+    class Meta:
+        ordering = ('-revoked_at',)
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+
+    def __str__(self):
+        return self.jti or f'Все токены {self.user_id}'
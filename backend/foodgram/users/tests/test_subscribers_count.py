@@ -0,0 +1,69 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from users.models import Subscription, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SubscribersCountTest(TestCase):
+    """Изменение профиля не затирает счётчик подписчиков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.follower = User.objects.create_user(
+            username='follower', email='follower@example.com',
+            password='pass')
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # Автор прочитан до подписки, как пользователь из кеша токенов.
+        self.stale_author = User.objects.get(pk=self.author.pk)
+        Subscription.objects.create(user=self.follower, author=self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(self.stale_author)
+
+    def assert_count(self, expected):
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, expected)
+
+    def test_subscription_updates_count(self):
+        self.assert_count(1)
+        Subscription.objects.filter(author=self.author).delete()
+        self.assert_count(0)
+
+    def test_avatar_update_keeps_count(self):
+        response = self.client.put(
+            '/api/users/me/avatar/', {'avatar': image()}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assert_count(1)
+
+    def test_set_password_keeps_count(self):
+        response = self.client.post(
+            '/api/users/set_password/',
+            {'current_password': 'pass', 'new_password': 'N3w-pass-2024'},
+            format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assert_count(1)
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.check_password('N3w-pass-2024'))